@@ -0,0 +1,59 @@
+"""Measure time taken by imports of spongeblob in fresh interpreters.
+
+Compares importing spongeblob alone, importing it and setting up a single
+provider, and importing every provider module, which is what importing
+spongeblob used to cost before provider modules were imported lazily.
+
+Usage: python benchmarks/import_time.py [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('import spongeblob',
+     'import spongeblob'),
+    ('spongeblob + S3',
+     'import spongeblob; spongeblob.get_provider_class("S3")'),
+    ('spongeblob + WABS',
+     'import spongeblob; spongeblob.get_provider_class("WABS")'),
+    ('all providers (eager)',
+     'import spongeblob.storage.s3, spongeblob.storage.wabs'),
+]
+
+TIMER = """
+import time
+started = time.time()
+{0}
+print(time.time() - started)
+"""
+
+
+def time_statement(statement, runs):
+    """Median seconds taken by a statement, each run in a new interpreter"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    timings = sorted(
+        float(subprocess.check_output([sys.executable, '-c',
+                                       TIMER.format(statement)], env=env))
+        for _ in range(runs))
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=11,
+                        help='Number of interpreters started for each case')
+    args = parser.parse_args()
+
+    # Warm up bytecode caches, so that the first case is not penalized
+    time_statement(CASES[-1][1], 1)
+    for name, statement in CASES:
+        print('{0:<24}{1:>8.1f} ms'.format(
+            name, time_statement(statement, args.runs) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,10 @@ setup(name='spongeblob',
       packages=find_packages(),
       install_requires=['azure-storage-blob==1.1.0',
                         'boto3==1.7.12',
+                        'futures;python_version<"3"',
                         'tenacity==4.10.0'],
+      extras_require={'crc32c': ['crc32c'],
+                      'zstd': ['zstandard']},
       tests_require=['pytest',
                      'pytest-docker'],
       test_suite='pytest'
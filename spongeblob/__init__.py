@@ -1,15 +1,29 @@
-from sys import modules
+from .storage import (TransferProfile,
+                      ClientPool,
+                      DEFAULT_CLIENT_POOL,
+                      ChecksumMismatchError,
+                      CopyFailedError,
+                      CopyHandle,
+                      get_provider_class,
+                      PROVIDERS)
+from .utils import lazy_attributes
 
-from .storage import *
+__all__ = ['TransferProfile', 'ClientPool', 'DEFAULT_CLIENT_POOL',
+           'ChecksumMismatchError', 'CopyFailedError', 'CopyHandle',
+           'get_provider_class', 'setup_storage'] + sorted(PROVIDERS)
 
 
 def setup_storage(storage_provider, *args, **kwargs):
-    """Function to setup a Storage object for specified storage provider
+    """Function to setup a Storage object for specified storage provider. Only
+    the module of the specified storage provider is imported, on first use,
+    along with the sdk it depends on.
 
     :param str storage_provider: Setup storage with specified storage provider.
                                  Supported storage_provider are 's3' and 'wabs'.
     :param \**kwargs: For the storage provider used, you will also be required to pass
                       initialization parameters of the respective storage class.
+                      All storage classes accept a `transfer_profile`, either a
+                      :py:class:`TransferProfile` or the name of one of its presets.
     :returns: An object for the specified storage class setup with passed storage creds
     :rtype: S3, WABS
     :Example:
@@ -27,10 +41,16 @@ def setup_storage(storage_provider, *args, **kwargs):
                                  container_name='testcontainer',
                                  sas_token='testtoken')
 
+            s3 = setup_storage('s3',
+                               aws_key='access_key_id',
+                               aws_secret='access_key_secret',
+                               bucket_name='testbucket',
+                               transfer_profile='few_huge_objects')
+
     """
-    try:
-        storage_class = getattr(modules[__name__],
-                                storage_provider.upper())
-        return storage_class(*args, **kwargs)
-    except AttributeError:
-        raise ValueError('Unsupported storage "{0}"'.format(storage_provider))
+    storage_class = get_provider_class(storage_provider.upper())
+    return storage_class(*args, **kwargs)
+
+
+# Storage classes are imported from `spongeblob.storage` on first use
+lazy_attributes(__name__, PROVIDERS, get_provider_class)
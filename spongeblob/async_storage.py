@@ -0,0 +1,189 @@
+"""An asyncio facade for spongeblob storages. This module requires python 3.6
+or later, for async generators."""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import spongeblob as sb
+from spongeblob.retriable_storage import RetriableStorage
+from spongeblob.storage.storage import entry_name
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncStorage:
+    """This class wraps the spongeblob storage client for use from asyncio
+    code. Blocking storage calls run on a thread pool, at most
+    `max_concurrency` at a time, and are retried with exponential backoff for
+    the retriable exceptions of each method, like
+    :py:class:`spongeblob.retriable_storage.RetriableStorage` does, without
+    blocking the event loop while waiting.
+    """
+
+    def __init__(self, provider,
+                 max_attempts=3, wait_multiplier=2, max_wait_seconds=30,
+                 max_concurrency=16, *args, **kwargs):
+        """Intitialize a storage service for asyncio. Each call is retried for
+        `max_attempts`, and the backoff time after an attempt equals
+        2 ^ `attempt_number` * `wait_multiplier`, upto `max_wait_seconds`.
+
+        :param str provider: Any provider supported by spongeblob
+        :param int max_attempts: Maximum retry attempts
+        :param int wait_multiplier: Multiplier factor for exponential backoff
+        :param int max_wait_seconds: Max wait time between attempts
+        :param int max_concurrency: Maximum number of storage calls running concurrently
+
+        :Example:
+            ::
+
+                from spongeblob.async_storage import AsyncStorage
+
+                async def main():
+                    async with AsyncStorage('s3',
+                                            aws_key='access_key_id',
+                                            aws_secret='access_key_secret',
+                                            bucket_name='testbucket') as s3:
+                        await s3.upload_file('/path/to/key', '/path/on/disk')
+                        async for obj in s3.list_object_keys('/path/'):
+                            print(obj['key'])
+
+        """
+        self._storage = sb.setup_storage(provider, *args, **kwargs)
+        self.max_attempts = max_attempts
+        self.wait_multiplier = wait_multiplier
+        self.max_wait_seconds = max_wait_seconds
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        # created on first use, to bind to the running event loop
+        self._semaphore = None
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking function on the thread pool of the storage"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _call(self, method_name, *args, **kwargs):
+        """Call a method of the storage, retrying its retriable exceptions"""
+        method = getattr(self._storage, method_name)
+        retriable_exceptions = self._storage.get_retriable_exceptions(
+            method_name)
+        attempt = 1
+        while True:
+            try:
+                return await self._run(method, *args, **kwargs)
+            except retriable_exceptions:
+                if attempt >= self.max_attempts:
+                    raise
+            wait = min(self.wait_multiplier * 2 ** attempt,
+                       self.max_wait_seconds)
+            attempt += 1
+            logger.warning("Attempt {0} for running function {1}"
+                           .format(attempt, method_name))
+            await asyncio.sleep(wait)
+
+    async def upload_file(self, destination_key, source_file, metadata=None,
+                          skip_if_identical=False, checksum=None,
+                          codec=None):
+        """Upload a file from local filesystem, see `Storage.upload_file`"""
+        return await self._call('upload_file', destination_key, source_file,
+                                metadata=metadata,
+                                skip_if_identical=skip_if_identical,
+                                checksum=checksum, codec=codec)
+
+    async def download_file(self, source_key, destination_file,
+                            verify_checksum=False, decode=True):
+        """Download an object to local filesystem, see `Storage.download_file`"""
+        return await self._call('download_file', source_key,
+                                destination_file,
+                                verify_checksum=verify_checksum,
+                                decode=decode)
+
+    async def copy_from_key(self, source_key, destination_key, metadata=None):
+        """Copy an object on server side, see `Storage.copy_from_key`"""
+        return await self._call('copy_from_key', source_key, destination_key,
+                                metadata=metadata)
+
+    async def delete_key(self, destination_key):
+        """Delete an object, see `Storage.delete_key`"""
+        return await self._call('delete_key', destination_key)
+
+    async def get_object_properties(self, key, metadata=False):
+        """Fetch object properties, see `Storage.get_object_properties`"""
+        return await self._call('get_object_properties', key,
+                                metadata=metadata)
+
+    async def list_object_keys(self, prefix='', metadata=False,
+                               pagesize=1000, delimiter=None):
+        """List files for the specified prefix, see `Storage.list_object_keys`.
+        Pages are fetched on the thread pool as the async generator is
+        consumed. On retriable exceptions, the listing is resumed from the
+        page being yielded, skipping keys already yielded, like
+        `RetriableStorage.list_object_keys` does.
+
+        :returns: An async generator of dict describing objects found by api
+        :rtype: AsyncIterator[dict]
+
+        """
+        retriable_exceptions = self._storage.get_retriable_exceptions(
+            'list_object_keys')
+        marker, last_key = None, None
+        attempt = 1
+        while True:
+            pages = self._storage._list_pages(prefix, metadata=metadata,
+                                              pagesize=pagesize,
+                                              delimiter=delimiter,
+                                              marker=marker)
+            try:
+                while True:
+                    page = await self._run(next, pages, None)
+                    if page is None:
+                        return
+                    marker = page.marker
+                    for obj in page.entries():
+                        name = entry_name(obj)
+                        if last_key is not None and name <= last_key:
+                            continue
+                        last_key = name
+                        attempt = 1
+                        yield obj
+            except retriable_exceptions:
+                if attempt >= self.max_attempts:
+                    raise
+            finally:
+                pages.close()
+            wait = min(self.wait_multiplier * 2 ** attempt,
+                       self.max_wait_seconds)
+            attempt += 1
+            logger.warning("Attempt {0} for running function list_object_keys, "
+                           "resuming after key {1}".format(attempt, last_key))
+            await asyncio.sleep(wait)
+
+    def __getattr__(self, attr):
+        """Any other retriable method of the storage is exposed as a
+        coroutine function"""
+        if attr in RetriableStorage.RETRIABLE_METHODS and \
+                hasattr(self._storage, attr):
+            return functools.partial(self._call, attr)
+        raise AttributeError(attr)
+
+    async def close(self):
+        """Wait for running calls and shut down the thread pool"""
+        await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(self._executor.shutdown, wait=True))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __repr__(self):
+        return "AsyncStorage({0})".format(self._storage)
+
+    def __str__(self):
+        return self.__repr__()
@@ -0,0 +1,453 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+from spongeblob.storage.blobio import BlobWriter
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(last_modified):
+    """Normalize a last_modified value for storing in cache entries"""
+    if hasattr(last_modified, 'isoformat'):
+        return last_modified.isoformat()
+    return str(last_modified)
+
+
+class CachingStorage(object):
+    """This class wraps a spongeblob storage client with a read through cache
+    on local disk for `download_file`. The cache is bounded by bytes, and least
+    recently used objects are evicted first. A cached object is validated
+    against size and last_modified of its `get_object_properties` before use,
+    or trusted without validation for `ttl` seconds after it was downloaded.
+    Concurrent downloads of an object which is not cached share a single
+    download. Uploads, copies, deletes and writes through this class
+    invalidate the cached objects they modify once done, and downloads in
+    progress while they are done are not cached. Cached objects being copied
+    out when invalidated are removed once the copies complete.
+
+    Cache entries are kept in `cache_dir` along with a json file describing
+    them, so the cache is reused by later instances using the same directory.
+    Partial downloads left behind by interrupted instances are removed once
+    they are older than `STALE_DOWNLOAD_SECONDS`, so that downloads in progress
+    by other instances sharing the directory are left alone.
+    """
+
+    # Seconds after which a partial download found in the cache directory is
+    # considered abandoned
+    STALE_DOWNLOAD_SECONDS = 24 * 60 * 60
+
+    def __init__(self, storage, cache_dir, max_bytes=1024 * 1024 * 1024,
+                 ttl=None, hardlink=False):
+        """
+        :param storage: Storage to download objects from
+        :type storage: Union[Storage, RetriableStorage]
+        :param str cache_dir: Directory on local filesystem to cache objects in
+        :param int max_bytes: Maximum total size of cached objects. Objects bigger
+                              than this are not cached
+        :param int ttl: Seconds for which a cached object is used without
+                        validating it. Cached objects are validated on every
+                        download if None
+        :param bool hardlink: If set to True, downloaded files are hard links to
+                              the cached files, falling back to copies across
+                              filesystems. Such files must not be modified, as
+                              that modifies the cache too
+
+        :Example:
+            ::
+
+                from spongeblob import setup_storage
+                from spongeblob.caching_storage import CachingStorage
+
+                s3 = CachingStorage(setup_storage('s3',
+                                                  aws_key='access_key_id',
+                                                  aws_secret='access_key_secret',
+                                                  bucket_name='testbucket'),
+                                    '/var/cache/spongeblob',
+                                    max_bytes=10 * 1024 ** 3)
+                s3.download_file('/path/to/key', '/path/on/disk')
+
+        """
+        self._storage = storage
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hardlink = hardlink
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._pins = {}
+        self._inflight = {}
+        # Keys invalidated while being downloaded into the cache
+        self._stale_fetches = set()
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self._load_entries()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir,
+                            hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _load_entries(self):
+        """Load entries of a cache directory used earlier, least recently
+        downloaded first"""
+        entries = []
+        stale_before = time.time() - self.STALE_DOWNLOAD_SECONDS
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.download'):
+                # Left behind by an interrupted download, unless it is recent
+                # and may be in progress in another instance
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    if os.path.getmtime(path) < stale_before:
+                        os.remove(path)
+                except OSError:
+                    pass
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name)) as f:
+                    entry = json.load(f)
+            except (IOError, OSError, ValueError):
+                continue
+            if os.path.exists(self._entry_path(entry['key'])):
+                entries.append(entry)
+        for entry in sorted(entries, key=lambda entry: entry['fetched_at']):
+            self._entries[entry['key']] = entry
+            self._bytes += entry['size']
+        self._evict()
+
+    def stats(self):
+        """Return counts of cache hits, misses and evictions
+
+        :returns: A dict with hits, misses, evictions, entries and bytes keys
+        :rtype: dict
+
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'bytes': self._bytes}
+
+    def download_file(self, source_key, destination_file,
+                      verify_checksum=False, decode=True):
+        """Download an object to local filesystem via the cache. Cached
+        objects are reused by downloads with the same `decode`, and by
+        downloads with `verify_checksum` only if verified when cached.
+
+        :param str source_key: Key for object to be downloaded
+        :param str destination_file: Path on local filesystem to download file
+        :param bool verify_checksum: Passed on to `download_file` of storage
+        :param bool decode: Passed on to `download_file` of storage
+        :returns: Nothing
+        :rtype: None
+
+        """
+        fetched = False
+        while True:
+            entry = self._pinned_entry(source_key, fetched, verify_checksum,
+                                       decode)
+            if entry is not None:
+                try:
+                    self._place(source_key, destination_file)
+                finally:
+                    self._unpin(source_key)
+                return
+
+            with self._lock:
+                inflight = self._inflight.get(source_key)
+                if inflight is None:
+                    inflight = self._inflight[source_key] = threading.Event()
+                    leader = True
+                else:
+                    leader = False
+            if not leader:
+                # Another thread is downloading the object, look it up in
+                # cache again once it is done
+                inflight.wait()
+                continue
+
+            try:
+                with self._lock:
+                    self.misses += 1
+                if not self._fetch(source_key, verify_checksum, decode):
+                    # Object is too big to be cached
+                    self._storage.download_file(
+                        source_key, destination_file,
+                        verify_checksum=verify_checksum, decode=decode)
+                    return
+                fetched = True
+            finally:
+                with self._lock:
+                    del self._inflight[source_key]
+                    self._stale_fetches.discard(source_key)
+                inflight.set()
+
+    def _pinned_entry(self, key, fetched=False, verify_checksum=False,
+                      decode=True):
+        """Return the valid cache entry of a key, pinned so that it is not
+        evicted until unpinned, or None if the key is not cached, or cached
+        by a download with other options. Entries just fetched by the caller
+        are neither validated nor counted as hits."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is None or entry.get('stale') or
+                    entry.get('decode', True) != decode or
+                    (verify_checksum and not entry.get('verified'))):
+                return None
+            self._pins[key] = self._pins.get(key, 0) + 1
+            if fetched:
+                return entry
+
+        if self.ttl is None or time.time() - entry['fetched_at'] > self.ttl:
+            properties = self._storage.get_object_properties(key)
+            if (properties is None or
+                    properties['size'] != entry.get('object_size',
+                                                    entry['size']) or
+                    _timestamp(properties['last_modified']) !=
+                    entry['last_modified']):
+                self._unpin(key)
+                self.invalidate(key)
+                return None
+            entry['fetched_at'] = time.time()
+
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries[key] = self._entries.pop(key)
+        return entry
+
+    def _unpin(self, key):
+        with self._lock:
+            self._pins[key] -= 1
+            if not self._pins[key]:
+                del self._pins[key]
+                entry = self._entries.get(key)
+                if entry is not None and entry.get('stale'):
+                    self._remove_entry(key)
+
+    def _place(self, key, destination_file):
+        """Hard link or copy a cached object to destination file"""
+        entry_path = self._entry_path(key)
+        if self.hardlink:
+            if os.path.exists(destination_file):
+                os.remove(destination_file)
+            try:
+                os.link(entry_path, destination_file)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(entry_path, destination_file)
+
+    def _fetch(self, key, verify_checksum=False, decode=True):
+        """Download an object into the cache. The download is discarded if
+        the key is invalidated meanwhile.
+
+        :returns: False if the object is too big to be cached, else True
+        :rtype: bool
+
+        """
+        properties = self._storage.get_object_properties(key)
+        if properties is not None and properties['size'] > self.max_bytes:
+            return False
+
+        fd, download_path = tempfile.mkstemp(dir=self.cache_dir,
+                                             suffix='.download')
+        os.close(fd)
+        try:
+            self._storage.download_file(key, download_path,
+                                        verify_checksum=verify_checksum,
+                                        decode=decode)
+        except Exception:
+            os.remove(download_path)
+            raise
+
+        # NOTE: properties are fetched before the download, so if the object
+        # changes meanwhile, the entry fails its next validation
+        size = os.path.getsize(download_path)
+        entry = {'key': key,
+                 'size': size,
+                 'object_size': properties['size'] if properties else size,
+                 'last_modified': _timestamp(properties['last_modified']
+                                             if properties else None),
+                 'fetched_at': time.time(),
+                 'decode': decode,
+                 'verified': verify_checksum}
+        with self._lock:
+            if key in self._stale_fetches:
+                os.remove(download_path)
+                logger.debug("Discarded download of invalidated {0}"
+                             .format(key))
+                return True
+            previous_entry = self._entries.pop(key, None)
+            if previous_entry is not None:
+                self._bytes -= previous_entry['size']
+            # Replacing the file keeps copies of a pinned entry in progress
+            # reading the previous file
+            os.rename(download_path, self._entry_path(key))
+            with open(self._entry_path(key) + '.json', 'w') as f:
+                json.dump(entry, f)
+            self._entries[key] = entry
+            self._bytes += size
+        self._evict()
+        logger.debug("Cached {0} ({1} bytes)".format(key, size))
+        return True
+
+    def _evict(self):
+        """Evict least recently used entries until cache is under max_bytes"""
+        with self._lock:
+            for key in list(self._entries):
+                if self._bytes <= self.max_bytes:
+                    break
+                if key in self._pins:
+                    continue
+                self._remove_entry(key)
+                self.evictions += 1
+
+    def _remove_entry(self, key):
+        """Remove an entry and its files, expects the lock to be held"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+        for path in (self._entry_path(key), self._entry_path(key) + '.json'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def invalidate(self, key):
+        """Remove an object from the cache. An object being copied out of the
+        cache is marked stale instead, and removed once copies complete. A
+        download of the object into the cache in progress is discarded.
+
+        :param str key: Key for object to be removed from cache
+        :returns: Nothing
+        :rtype: None
+
+        """
+        with self._lock:
+            if key in self._inflight:
+                self._stale_fetches.add(key)
+            if key not in self._entries:
+                return
+            if key in self._pins:
+                self._entries[key]['stale'] = True
+                # The json file is removed so that the stale entry is not
+                # loaded by later instances
+                try:
+                    os.remove(self._entry_path(key) + '.json')
+                except OSError:
+                    pass
+            else:
+                self._remove_entry(key)
+
+    def open(self, key, mode='rb', **kwargs):
+        """Open an object as a file object like `Storage.open`. Objects
+        written via the returned file object are invalidated once committed
+        """
+        if mode == 'wb':
+            # The writer commits the object via this class
+            return BlobWriter(self, key, **kwargs)
+        return self._storage.open(key, mode, **kwargs)
+
+    def _complete_multipart(self, key, *args, **kwargs):
+        """Commit an object written in parts, invalidating the cached object
+        of the key"""
+        try:
+            return self._storage._complete_multipart(key, *args, **kwargs)
+        finally:
+            self.invalidate(key)
+
+    def upload_file(self, destination_key, *args, **kwargs):
+        """Upload a file, invalidating the cached object of the key"""
+        try:
+            return self._storage.upload_file(destination_key, *args, **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def upload_file_obj(self, destination_key, *args, **kwargs):
+        """Upload a file object, invalidating the cached object of the key"""
+        try:
+            return self._storage.upload_file_obj(destination_key, *args,
+                                                 **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def upload_bytes(self, destination_key, *args, **kwargs):
+        """Upload an object from memory, invalidating the cached object of the key"""
+        try:
+            return self._storage.upload_bytes(destination_key, *args,
+                                              **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def copy_from_key(self, source_key, destination_key, *args, **kwargs):
+        """Copy an object, invalidating the cached object of the destination key"""
+        try:
+            return self._storage.copy_from_key(source_key, destination_key,
+                                               *args, **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def start_copy(self, source_key, destination_key, *args, **kwargs):
+        """Start a copy, invalidating the cached object of the destination key"""
+        try:
+            return self._storage.start_copy(source_key, destination_key,
+                                            *args, **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def copy_keys(self, keys, *args, **kwargs):
+        """Copy objects, invalidating the cached object of each destination
+        key as its result is yielded"""
+        for result in self._storage.copy_keys(keys, *args, **kwargs):
+            self.invalidate(result['destination_key'])
+            yield result
+
+    def delete_key(self, destination_key):
+        """Delete an object, invalidating its cached object"""
+        try:
+            return self._storage.delete_key(destination_key)
+        finally:
+            self.invalidate(destination_key)
+
+    def delete_batch(self, keys):
+        """Delete a batch of objects, invalidating their cached objects"""
+        try:
+            return self._storage.delete_batch(keys)
+        finally:
+            for key in keys:
+                self.invalidate(key)
+
+    def delete_keys(self, keys):
+        """Delete objects in batches, invalidating the cached object of each
+        key as its result is yielded"""
+        for result in self._storage.delete_keys(keys):
+            self.invalidate(result['key'])
+            yield result
+
+    def delete_prefix(self, prefix):
+        """Delete all objects matching a prefix, invalidating the cached
+        object of each key as its result is yielded"""
+        for result in self._storage.delete_prefix(prefix):
+            self.invalidate(result['key'])
+            yield result
+
+    def __getattr__(self, attr):
+        return getattr(self._storage, attr)
+
+    def __repr__(self):
+        return "CachingStorage({0})".format(self._storage)
+
+    def __str__(self):
+        return self.__repr__()
@@ -0,0 +1,251 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class MetadataCachingStorage(object):
+    """This class wraps a spongeblob storage client with an in process cache
+    for results of `get_object_properties` and `list_object_keys_flat`. Each
+    result is cached for `ttl` seconds, and least recently used results are
+    evicted once the cache holds `max_entries` of them. Objects not found are
+    cached as well.
+
+    Uploads, copies and deletes through this class invalidate the properties
+    of the keys they modify, and every cached listing of a prefix matching
+    these keys. Changes made by other clients are seen once cached results
+    expire.
+    """
+
+    def __init__(self, storage, ttl=60, max_entries=10000):
+        """
+        :param storage: Storage to fetch properties and listings from
+        :type storage: Union[Storage, RetriableStorage]
+        :param int ttl: Seconds for which a result is cached
+        :param int max_entries: Maximum number of properties and listings cached
+
+        :Example:
+            ::
+
+                from spongeblob import setup_storage
+                from spongeblob.metadata_cache import MetadataCachingStorage
+
+                s3 = MetadataCachingStorage(setup_storage(
+                                                's3',
+                                                aws_key='access_key_id',
+                                                aws_secret='access_key_secret',
+                                                bucket_name='testbucket'),
+                                            ttl=30)
+                s3.list_object_keys_flat('/path/')
+
+        """
+        self._storage = storage
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Maps ('properties', key, metadata) and
+        # ('listing', prefix, (metadata, listing_arguments)) to
+        # (expires_at, result), least recently used first
+        self._entries = OrderedDict()
+        # Incremented on every invalidation, so that results fetched while
+        # invalidating are not cached
+        self._generation = 0
+
+    def stats(self):
+        """Return counts of cache hits, misses and evictions
+
+        :returns: A dict with hits, misses, evictions and entries keys
+        :rtype: dict
+
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries)}
+
+    def _cached(self, entry_key, fetch):
+        """Return a cached result, or fetch and cache it"""
+        with self._lock:
+            entry = self._entries.pop(entry_key, None)
+            if entry is not None and entry[0] > time.time():
+                self._entries[entry_key] = entry
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        result = fetch()
+        with self._lock:
+            if generation == self._generation:
+                self._entries.pop(entry_key, None)
+                self._entries[entry_key] = (time.time() + self.ttl, result)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def get_object_properties(self, key, metadata=False):
+        """Fetch object properties like `Storage.get_object_properties`, via
+        the cache
+
+        :param str key: Key for object
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :returns: A dict describing the object, or None if not found
+        :rtype: dict
+
+        """
+        properties = self._cached(
+            ('properties', key, metadata),
+            lambda: self._storage.get_object_properties(key,
+                                                        metadata=metadata))
+        return dict(properties) if properties is not None else None
+
+    def list_object_keys_flat(self, prefix='', metadata=False, pagesize=1000,
+                              **kwargs):
+        """List objects like `Storage.list_object_keys_flat`, via the cache
+
+        :param str prefix: String to match when searching files
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :param int pagesize: Number of objects requested in a single call
+        :param \**kwargs: Other arguments of `Storage.list_object_keys`, like
+                          `delimiter`, which are part of the cached listing
+        :returns: A list of dict describing objects found by api
+        :rtype: list[dict]
+
+        """
+        objects = self._cached(
+            ('listing', prefix, (metadata, tuple(sorted(kwargs.items())))),
+            lambda: self._storage.list_object_keys_flat(prefix,
+                                                        metadata=metadata,
+                                                        pagesize=pagesize,
+                                                        **kwargs))
+        return [dict(obj) for obj in objects]
+
+    def invalidate(self, key):
+        """Remove cached properties of an object, and cached listings of
+        prefixes matching it
+
+        :param str key: Key for object modified
+        :returns: Nothing
+        :rtype: None
+
+        """
+        with self._lock:
+            self._generation += 1
+            for entry_key in list(self._entries):
+                kind, name, _ = entry_key
+                if ((kind == 'properties' and name == key) or
+                        (kind == 'listing' and key.startswith(name))):
+                    del self._entries[entry_key]
+
+    def invalidate_prefix(self, prefix):
+        """Remove cached properties of objects matching a prefix, and cached
+        listings of prefixes overlapping it
+
+        :param str prefix: Prefix of objects modified
+        :returns: Nothing
+        :rtype: None
+
+        """
+        with self._lock:
+            self._generation += 1
+            for entry_key in list(self._entries):
+                kind, name, _ = entry_key
+                if name.startswith(prefix) or (kind == 'listing' and
+                                               prefix.startswith(name)):
+                    del self._entries[entry_key]
+
+    def clear(self):
+        """Remove all cached results"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def upload_file(self, destination_key, *args, **kwargs):
+        """Upload a file, invalidating cached results for the key"""
+        try:
+            return self._storage.upload_file(destination_key, *args, **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def upload_file_obj(self, destination_key, *args, **kwargs):
+        """Upload a file object, invalidating cached results for the key"""
+        try:
+            return self._storage.upload_file_obj(destination_key, *args,
+                                                 **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def upload_bytes(self, destination_key, *args, **kwargs):
+        """Upload an object from memory, invalidating cached results for the key"""
+        try:
+            return self._storage.upload_bytes(destination_key, *args,
+                                              **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def copy_from_key(self, source_key, destination_key, *args, **kwargs):
+        """Copy an object, invalidating cached results for the destination key"""
+        try:
+            return self._storage.copy_from_key(source_key, destination_key,
+                                               *args, **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def start_copy(self, source_key, destination_key, *args, **kwargs):
+        """Start a copy, invalidating cached results for the destination key"""
+        try:
+            return self._storage.start_copy(source_key, destination_key,
+                                            *args, **kwargs)
+        finally:
+            self.invalidate(destination_key)
+
+    def copy_keys(self, keys, *args, **kwargs):
+        """Copy objects, invalidating cached results for each destination key
+        as its result is yielded"""
+        for result in self._storage.copy_keys(keys, *args, **kwargs):
+            self.invalidate(result['destination_key'])
+            yield result
+
+    def delete_key(self, destination_key):
+        """Delete an object, invalidating cached results for the key"""
+        try:
+            return self._storage.delete_key(destination_key)
+        finally:
+            self.invalidate(destination_key)
+
+    def delete_batch(self, keys):
+        """Delete a batch of objects, invalidating cached results for the keys"""
+        try:
+            return self._storage.delete_batch(keys)
+        finally:
+            for key in keys:
+                self.invalidate(key)
+
+    def delete_keys(self, keys):
+        """Delete objects in batches, invalidating cached results for each key
+        as its result is yielded"""
+        for result in self._storage.delete_keys(keys):
+            self.invalidate(result['key'])
+            yield result
+
+    def delete_prefix(self, prefix):
+        """Delete all objects matching a prefix, invalidating cached results
+        for the prefix once done"""
+        try:
+            for result in self._storage.delete_prefix(prefix):
+                yield result
+        finally:
+            self.invalidate_prefix(prefix)
+
+    def __getattr__(self, attr):
+        return getattr(self._storage, attr)
+
+    def __repr__(self):
+        return "MetadataCachingStorage({0})".format(self._storage)
+
+    def __str__(self):
+        return self.__repr__()
@@ -0,0 +1,188 @@
+"""Copy and move all objects under a prefix of a storage to another prefix on
+server side. Objects are listed lazily, a page ahead of the copies, and
+copied concurrently in batches with `copy_keys`. S3 copies objects over the
+`multipart_threshold` of its transfer profile with multipart `UploadPartCopy`
+requests, and WABS polls the pending copies of a batch together. Moves
+delete the copied objects of each batch with `delete_keys`, which uses the
+batch delete of the provider.
+
+With a `checkpoint_file`, the last source key up to which all objects were
+copied, and deleted for moves, is recorded after each batch. Running the
+same copy or move again with the checkpoint file resumes after that key,
+and the checkpoint file is removed once all objects are copied.
+"""
+import os
+import json
+import logging
+
+from spongeblob.utils import chunked
+
+logger = logging.getLogger(__name__)
+
+# Number of copy results for which sources are deleted, and the checkpoint
+# recorded, at once
+BATCH_SIZE = 1000
+
+
+def _load_checkpoint(checkpoint_file, source_prefix, destination_prefix,
+                     delete):
+    """Return the last key recorded in a checkpoint file, or None if there is
+    no checkpoint file"""
+    if checkpoint_file is None or not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file) as f:
+        checkpoint = json.load(f)
+    if (checkpoint['source_prefix'] != source_prefix or
+            checkpoint['destination_prefix'] != destination_prefix or
+            checkpoint.get('delete') != delete):
+        raise ValueError('Checkpoint file {0} is of a {1} from {2} to {3}'
+                         .format(checkpoint_file,
+                                 'move' if checkpoint.get('delete')
+                                 else 'copy',
+                                 checkpoint['source_prefix'],
+                                 checkpoint['destination_prefix']))
+    return checkpoint['last_key']
+
+
+def _save_checkpoint(checkpoint_file, source_prefix, destination_prefix,
+                     delete, last_key):
+    """Record the last key in a checkpoint file, replacing it atomically"""
+    tmp_path = checkpoint_file + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'source_prefix': source_prefix,
+                   'destination_prefix': destination_prefix,
+                   'delete': delete,
+                   'last_key': last_key}, f)
+    if hasattr(os, 'replace'):
+        os.replace(tmp_path, checkpoint_file)
+    else:
+        # Python 2 has no os.replace, and os.rename replaces files atomically
+        # on POSIX only
+        if os.name == 'nt' and os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+        os.rename(tmp_path, checkpoint_file)
+
+
+def _check_prefixes(source_prefix, destination_prefix):
+    """Raise ValueError if copies to a destination prefix would be listed
+    with the source prefix"""
+    if destination_prefix.startswith(source_prefix):
+        raise ValueError('Destination prefix {0} matches source prefix {1}'
+                         .format(destination_prefix, source_prefix))
+
+
+def _copy_prefix(storage, source_prefix, destination_prefix, metadata,
+                 checkpoint_file, delete):
+    last_key = _load_checkpoint(checkpoint_file, source_prefix,
+                                destination_prefix, delete)
+    if last_key is not None:
+        logger.info("Resuming copy of {0} after key {1}"
+                    .format(source_prefix, last_key))
+
+    keys = ((obj['key'], destination_prefix + obj['key'][len(source_prefix):])
+            for obj in storage.list_object_keys(source_prefix, prefetch=1)
+            if last_key is None or obj['key'] > last_key)
+    # The checkpoint stops advancing at the first object not copied, so that
+    # it is copied again on resume
+    complete = True
+    results = storage.copy_keys(keys, metadata=metadata)
+    for batch in chunked(results, BATCH_SIZE):
+        if delete:
+            deletes = dict((result['key'], result) for result in
+                           storage.delete_keys([result['source_key']
+                                                for result in batch
+                                                if result['copied']]))
+            for result in batch:
+                delete_result = deletes.get(result['source_key'])
+                result['deleted'] = bool(delete_result and
+                                         delete_result['deleted'])
+                if delete_result and not delete_result['deleted']:
+                    result['error'] = delete_result['error']
+        for result in batch:
+            if not result['copied'] or (delete and not result['deleted']):
+                complete = False
+            elif complete:
+                last_key = result['source_key']
+        if checkpoint_file is not None and last_key is not None:
+            _save_checkpoint(checkpoint_file, source_prefix,
+                             destination_prefix, delete, last_key)
+        for result in batch:
+            yield result
+
+    if (checkpoint_file is not None and complete and
+            os.path.exists(checkpoint_file)):
+        os.remove(checkpoint_file)
+
+
+def copy_prefix(storage, source_prefix, destination_prefix, metadata=None,
+                checkpoint_file=None):
+    """Copy all objects matching a prefix to keys under another prefix, with
+    the rest of their keys after the prefix, on server side
+
+    :param storage: Storage to copy objects in
+    :type storage: Union[Storage, RetriableStorage]
+    :param str source_prefix: Prefix of objects to be copied
+    :param str destination_prefix: Prefix replacing `source_prefix` in keys of
+                                   copied objects. It must not start with
+                                   `source_prefix`
+    :param dict metadata: Metadata to be stored along with each object
+    :param str checkpoint_file: Path on local filesystem of a file recording
+                                progress of the copy, to resume it from
+    :returns: A generator of dict describing result of each copy, as returned
+              by `copy_keys`
+    :rtype: Iterator[dict]
+    :raises ValueError: If `destination_prefix` starts with `source_prefix`
+
+    :Example:
+        ::
+
+            from spongeblob import setup_storage
+            from spongeblob.prefix_copy import copy_prefix
+
+            s3 = setup_storage('s3',
+                               aws_key='access_key_id',
+                               aws_secret='access_key_secret',
+                               bucket_name='testbucket')
+            for result in copy_prefix(s3, 'path/to/prefix/', 'path/to/copy/',
+                                      checkpoint_file='/tmp/copy.json'):
+                if not result['copied']:
+                    print(result['source_key'], result['error'])
+
+    """
+    _check_prefixes(source_prefix, destination_prefix)
+    return _copy_prefix(storage, source_prefix, destination_prefix, metadata,
+                        checkpoint_file, delete=False)
+
+
+def move_prefix(storage, source_prefix, destination_prefix, metadata=None,
+                checkpoint_file=None):
+    """Move all objects matching a prefix to keys under another prefix, by
+    copying them on server side like `copy_prefix` and deleting the copied
+    objects. Objects which failed to copy are not deleted.
+
+    :param storage: Storage to move objects in
+    :type storage: Union[Storage, RetriableStorage]
+    :param str source_prefix: Prefix of objects to be moved
+    :param str destination_prefix: Prefix replacing `source_prefix` in keys of
+                                   moved objects. It must not start with
+                                   `source_prefix`
+    :param dict metadata: Metadata to be stored along with each object
+    :param str checkpoint_file: Path on local filesystem of a file recording
+                                progress of the move, to resume it from
+    :returns: A generator of dict describing result of each move. The
+              returned dict will look like this
+              ::
+
+                  {"source_key": "/key/for/source",
+                   "destination_key": "/key/for/destination",
+                   "copied": <True if object was copied, else False>,
+                   "deleted": <True if source was deleted, else False>,
+                   "error": Union(<error_message>, None)}
+
+    :rtype: Iterator[dict]
+    :raises ValueError: If `destination_prefix` starts with `source_prefix`
+
+    """
+    _check_prefixes(source_prefix, destination_prefix)
+    return _copy_prefix(storage, source_prefix, destination_prefix, metadata,
+                        checkpoint_file, delete=True)
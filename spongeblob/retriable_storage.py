@@ -1,4 +1,9 @@
+import time
+
 import spongeblob as sb
+from spongeblob.storage.copies import copy_in_batches
+from spongeblob.storage.storage import entry_name
+from spongeblob.utils import chunked, map_ordered, prefetch as prefetch_pages
 from tenacity import (Retrying,
                       retry_if_exception_type,
                       stop_after_attempt,
@@ -15,16 +20,22 @@ class RetriableStorage:
     retries.
     """
     # NOTE: tenacity library can only wrap regular functions for retries and
-    # can't wrap generators. That's why skipping `list_object_keys` function
-    # from retry method list
+    # can't wrap generators. That's why `list_object_keys` is skipped from
+    # retry method list, and resumes listing itself instead
     RETRIABLE_METHODS = set([
         "download_file",
+        "download_file_parallel",
+        "download_file_obj",
+        "download_bytes",
         "list_object_keys_flat",
         "get_object_properties",
         "upload_file",
         "upload_file_obj",
+        "upload_bytes",
         "copy_from_key",
-        "delete_key"])
+        "start_copy",
+        "delete_key",
+        "delete_batch"])
 
     def __init__(self, provider,
                  max_attempts=3, wait_multiplier=2, max_wait_seconds=30,
@@ -56,6 +67,9 @@ class RetriableStorage:
 
         """
         self._storage = sb.setup_storage(provider, *args, **kwargs)
+        self.max_attempts = max_attempts
+        self.wait_multiplier = wait_multiplier
+        self.max_wait_seconds = max_wait_seconds
         # create a cache for retrying objects
         self._retry_cache = {}
         self.retrying_args = {
@@ -94,6 +108,149 @@ class RetriableStorage:
         else:
             raise AttributeError
 
+    @property
+    def transfer_profile(self):
+        """Transfer profile of the wrapped storage"""
+        return self._storage.transfer_profile
+
+    @property
+    def MIN_PART_SIZE(self):
+        """Minimum size of parts of the wrapped storage"""
+        return self._storage.MIN_PART_SIZE
+
+    @property
+    def MAX_PARTS(self):
+        """Maximum number of parts of an object of the wrapped storage"""
+        return self._storage.MAX_PARTS
+
+    def list_object_keys(self, prefix='', metadata=False, pagesize=1000,
+                         prefetch=0, delimiter=None):
+        """List files for the specified prefix like `Storage.list_object_keys`,
+        resuming the listing on retriable exceptions. The marker of the page
+        being yielded and the last key yielded are tracked, and after a
+        backoff the listing is resumed from that page, skipping keys already
+        yielded, instead of restarting from scratch. Attempts are counted
+        afresh once a resumed listing yields more keys.
+
+        :param str prefix: String to match when searching files
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :param int pagesize: Limits the number of objects fetched in a single api call
+        :param int prefetch: Number of pages to fetch in a background thread ahead
+                             of the consumer. Pages are fetched only on demand if 0
+        :param str delimiter: If set, keys are rolled up into common prefixes
+                              at the delimiter, see `Storage.list_object_keys`
+        :returns: A generator of dict describing objects found by api
+        :rtype: Iterator[dict]
+
+        """
+        retriable_exceptions = self._storage.get_retriable_exceptions(
+            'list_object_keys')
+        marker, last_key = None, None
+        attempt = 1
+        while True:
+            pages = self._storage._list_pages(prefix, metadata=metadata,
+                                              pagesize=pagesize,
+                                              delimiter=delimiter,
+                                              marker=marker)
+            if prefetch:
+                pages = prefetch_pages(pages, depth=prefetch)
+            try:
+                for page in pages:
+                    marker = page.marker
+                    for obj in page.entries():
+                        # Keys are listed in lexicographical order, so keys
+                        # up to the last one yielded were yielded already
+                        name = entry_name(obj)
+                        if last_key is not None and name <= last_key:
+                            continue
+                        last_key = name
+                        attempt = 1
+                        yield obj
+                return
+            except retriable_exceptions:
+                if attempt >= self.max_attempts:
+                    raise
+            finally:
+                pages.close()
+            wait = min(self.wait_multiplier * 2 ** attempt,
+                       self.max_wait_seconds)
+            attempt += 1
+            logger.warn("Attempt {0} for running function list_object_keys, "
+                        "resuming after key {1}".format(attempt, last_key))
+            time.sleep(wait)
+
+    def list_prefixes(self, prefix='', delimiter='/', pagesize=1000):
+        """List common prefixes like `Storage.list_prefixes`, resuming the
+        listing on retriable exceptions
+
+        :param str prefix: String to match when searching files
+        :param str delimiter: Delimiter at which keys are rolled up
+        :param int pagesize: Limits the number of keys and prefixes fetched in a
+                             single api call
+        :returns: A generator of common prefixes
+        :rtype: Iterator[str]
+
+        """
+        for entry in self.list_object_keys(prefix, pagesize=pagesize,
+                                           delimiter=delimiter):
+            if 'prefix' in entry:
+                yield entry['prefix']
+
+    def get_object_properties_many(self, keys, metadata=False,
+                                   max_workers=16):
+        """Fetch properties of many objects like
+        `Storage.get_object_properties_many`, retrying each
+        `get_object_properties` call
+
+        :param keys: An iterable of keys for objects
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :param int max_workers: Maximum number of concurrent calls
+        :returns: A generator of dicts, or None for objects not found
+        :rtype: Iterator[dict]
+
+        """
+        return map_ordered(lambda key: self.get_object_properties(
+            key, metadata=metadata), keys, workers=max_workers)
+
+    def delete_keys(self, keys):
+        """Delete objects in batches like `Storage.delete_keys`, retrying each
+        `delete_batch` call
+
+        :param keys: An iterable of keys for objects to be deleted
+        :returns: A generator of dict describing result of each delete
+        :rtype: Iterator[dict]
+
+        """
+        for batch in chunked(keys, self._storage.DELETE_BATCH_SIZE):
+            for result in self.delete_batch(batch):
+                yield result
+
+    def copy_keys(self, keys, metadata=None):
+        """Copy objects on server side in batches like `Storage.copy_keys`,
+        retrying each `start_copy` call
+
+        :param keys: An iterable of tuples of source key and destination key
+        :param dict metadata: Metadata to be stored along with each object
+        :returns: A generator of dict describing result of each copy
+        :rtype: Iterator[dict]
+
+        """
+        return copy_in_batches(self.start_copy, self._storage.wait_copies,
+                               keys, metadata, self._storage.COPY_WORKERS,
+                               self._storage.COPY_BATCH_SIZE)
+
+    def delete_prefix(self, prefix):
+        """Delete all objects matching a prefix like `Storage.delete_prefix`,
+        resuming the listing and retrying each `delete_batch` call
+
+        :param str prefix: String to match when searching files to be deleted
+        :returns: A generator of dict describing result of each delete
+        :rtype: Iterator[dict]
+
+        """
+        return self.delete_keys(obj['key']
+                                for obj in self.list_object_keys(prefix))
+
     def __repr__(self):
         return "RetriableStorage({0})".format(self._storage)
 
@@ -1,2 +1,38 @@
-from .s3 import S3
-from .wabs import WABS
+from importlib import import_module
+
+from .profile import TransferProfile
+from .client_pool import ClientPool, DEFAULT_CLIENT_POOL
+from .checksum import ChecksumMismatchError
+from .copies import CopyFailedError, CopyHandle
+from ..utils import lazy_attributes
+
+# Storage classes of providers, and the modules defining them. Provider
+# modules import their sdks, which is slow, so they are only imported on
+# first use of their storage class
+PROVIDERS = {'S3': '.s3',
+             'WABS': '.wabs'}
+
+__all__ = ['TransferProfile', 'ClientPool', 'DEFAULT_CLIENT_POOL',
+           'ChecksumMismatchError', 'CopyFailedError', 'CopyHandle',
+           'get_provider_class'] + sorted(PROVIDERS)
+
+
+def get_provider_class(name):
+    """Import the module of a provider, and return its storage class
+
+    :param str name: Name of the storage class, one of the keys of `PROVIDERS`
+    :returns: The storage class
+    :rtype: type
+    :raises ValueError: If there is no such provider
+
+    """
+    try:
+        module_name = PROVIDERS[name]
+    except KeyError:
+        raise ValueError('Unsupported storage "{0}"'.format(name.lower()))
+    storage_class = getattr(import_module(module_name, __name__), name)
+    globals()[name] = storage_class
+    return storage_class
+
+
+lazy_attributes(__name__, PROVIDERS, get_provider_class)
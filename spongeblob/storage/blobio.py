@@ -0,0 +1,251 @@
+import io
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BlobReader(io.RawIOBase):
+    """A read only, seekable file object over a remote blob. Reads are served
+    from blocks fetched with ranged requests, which are kept in a small LRU
+    cache. On a cache miss, the missing block and up to `readahead` following
+    blocks are fetched with a single request.
+    """
+
+    def __init__(self, storage, key, block_size=1024 * 1024, readahead=1,
+                 cache_blocks=8):
+        """
+        :param Storage storage: Storage to read the blob from
+        :param str key: Key for object to be read
+        :param int block_size: Size in bytes of blocks fetched and cached
+        :param int readahead: Number of blocks fetched after a missing block
+        :param int cache_blocks: Maximum number of blocks kept in memory, at
+                                 least 1
+        :raises ValueError: If cache_blocks is less than 1
+        """
+        if cache_blocks < 1:
+            raise ValueError('cache_blocks must be at least 1, got {0}'
+                             .format(cache_blocks))
+        super(BlobReader, self).__init__()
+        self.storage = storage
+        self.key = key
+        self.block_size = block_size
+        self.readahead = max(min(readahead, cache_blocks - 1), 0)
+        self.cache_blocks = cache_blocks
+        self.size = storage._object_size(key)
+        self._position = 0
+        self._blocks = OrderedDict()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError('Invalid whence "{0}"'.format(whence))
+        if position < 0:
+            raise ValueError('Negative seek position {0}'.format(position))
+        self._position = position
+        return position
+
+    def readinto(self, b):
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+        view = memoryview(b)
+        count = 0
+        while count < len(view) and self._position < self.size:
+            index, offset = divmod(self._position, self.block_size)
+            block = self._get_block(index)
+            length = min(len(view) - count, len(block) - offset)
+            view[count:count + length] = block[offset:offset + length]
+            count += length
+            self._position += length
+        return count
+
+    def _get_block(self, index):
+        """Return a block from cache, or fetch it along with read ahead blocks"""
+        if index in self._blocks:
+            block = self._blocks.pop(index)
+            self._blocks[index] = block
+            return block
+
+        last_block = (self.size - 1) // self.block_size
+        end_index = index
+        while (end_index < min(index + self.readahead, last_block) and
+               end_index + 1 not in self._blocks):
+            end_index += 1
+        start = index * self.block_size
+        end = min((end_index + 1) * self.block_size, self.size) - 1
+        logger.debug("Reading range {0}-{1} of {2}"
+                     .format(start, end, self.key))
+        data = self.storage._read_range(self.key, start, end)
+
+        for block_index in range(index, end_index + 1):
+            block_start = (block_index - index) * self.block_size
+            self._blocks[block_index] = data[block_start:
+                                             block_start + self.block_size]
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        # Move the requested block to the end, so that it is evicted last
+        block = self._blocks.pop(index)
+        self._blocks[index] = block
+        return block
+
+    def close(self):
+        self._blocks.clear()
+        super(BlobReader, self).close()
+
+
+class BlobWriter(io.RawIOBase):
+    """A write only file object over a remote blob, for uploads of unknown
+    length. Written data is buffered in parts of `part_size`, which are
+    uploaded as multipart upload parts or blocks in background while more
+    data is written. Writes block while `max_concurrency` parts are being
+    uploaded, so at most `max_concurrency` + 1 parts are held in memory.
+    The blob is committed on `close`, and uploaded parts are discarded on
+    `abort`, if the writer is used as a context manager which exits with an
+    exception, or if the writer is garbage collected without being closed.
+    Blobs smaller than `part_size` are uploaded with a single request on
+    close.
+    """
+
+    def __init__(self, storage, key, metadata=None, part_size=None,
+                 max_concurrency=None):
+        """
+        :param Storage storage: Storage to write the blob to
+        :param str key: Key where to store object
+        :param dict metadata: Metadata to be stored along with object
+        :param int part_size: Size in bytes of uploaded parts, at least
+                              `MIN_PART_SIZE` of storage, which is 5MB for S3.
+                              Blobs can have upto `MAX_PARTS` of storage parts.
+                              Defaults to `part_size` of the transfer profile
+                              of storage
+        :param int max_concurrency: Maximum number of parts uploaded concurrently.
+                                    Defaults to `max_concurrency` of the transfer
+                                    profile of storage
+        :raises ValueError: If part_size is less than `MIN_PART_SIZE` of storage
+        """
+        part_size = part_size or storage.transfer_profile.part_size
+        if part_size < storage.MIN_PART_SIZE:
+            raise ValueError('part_size of {0} bytes is less than the minimum '
+                             'of {1} bytes for {2}'
+                             .format(part_size, storage.MIN_PART_SIZE,
+                                     type(storage).__name__))
+        super(BlobWriter, self).__init__()
+        self.storage = storage
+        self.key = key
+        self.metadata = metadata
+        self.part_size = part_size
+        max_concurrency = (max_concurrency or
+                           storage.transfer_profile.max_concurrency)
+        self._buffer = bytearray()
+        self._upload = None
+        self._parts = []
+        self._error = None
+        self._buffers = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+        self._raise_error()
+        view = memoryview(b)
+        written = len(view)
+        while len(view):
+            room = self.part_size - len(self._buffer)
+            self._buffer += view[:room]
+            view = view[room:]
+            if len(self._buffer) == self.part_size:
+                self._upload_buffer()
+        return written
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _upload_buffer(self):
+        """Submit the buffered part for upload, waiting for a free buffer"""
+        part_number = len(self._parts) + 1
+        if part_number > self.storage.MAX_PARTS:
+            raise ValueError('Blob {0} exceeds the maximum of {1} parts of {2} '
+                             'bytes, use a bigger part_size'
+                             .format(self.key, self.storage.MAX_PARTS,
+                                     self.part_size))
+        if not self._parts:
+            self._upload = self.storage._create_multipart(self.key,
+                                                          self.metadata)
+        self._buffers.acquire()
+        future = self._executor.submit(self.storage._upload_part, self.key,
+                                       self._upload, part_number,
+                                       bytes(self._buffer))
+        future.add_done_callback(self._part_done)
+        self._parts.append(future)
+        self._buffer = bytearray()
+
+    def _part_done(self, future):
+        self._buffers.release()
+        if future.exception() is not None and self._error is None:
+            self._error = future.exception()
+
+    def close(self):
+        """Upload the remaining buffered data and commit the blob"""
+        if self.closed:
+            return
+        try:
+            self._raise_error()
+            if not self._parts:
+                self.storage.upload_bytes(self.key, bytes(self._buffer),
+                                          metadata=self.metadata)
+            else:
+                if self._buffer:
+                    self._upload_buffer()
+                parts = [future.result() for future in self._parts]
+                self.storage._complete_multipart(self.key, self._upload,
+                                                 parts, self.metadata)
+            logger.debug("Committed {0}".format(self.key))
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=True)
+            super(BlobWriter, self).close()
+
+    def abort(self):
+        """Discard the upload without committing the blob"""
+        if self.closed:
+            return
+        try:
+            self._executor.shutdown(wait=True)
+            if self._parts:
+                self.storage._abort_multipart(self.key, self._upload)
+        finally:
+            self._buffer = bytearray()
+            super(BlobWriter, self).close()
+
+    def __del__(self):
+        # IOBase closes file objects when they are garbage collected, which
+        # would commit a blob abandoned while being written
+        if not self.closed and hasattr(self, '_executor'):
+            self.abort()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,205 @@
+import hashlib
+import io
+
+from .codec import _decompressor
+from ..utils import get_metadata
+
+# Supported checksum algorithms, in the order they are looked up in
+# metadata of objects
+CHECKSUMS = ('md5', 'crc32c')
+
+# Maximum bytes written ahead of the checksummed offset which HashingWriter
+# keeps in memory
+MAX_PENDING_BYTES = 64 * 1024 * 1024
+
+
+def checksum_metadata_key(name):
+    """Metadata key for a checksum of an object"""
+    return 'spongeblob_{0}'.format(name)
+
+
+class ChecksumMismatchError(Exception):
+    """Raised when the checksum of downloaded data does not match the
+    checksum stored along with the object"""
+
+    def __init__(self, key, name, expected, actual):
+        super(ChecksumMismatchError, self).__init__(
+            '{0} checksum mismatch for {1}: expected {2}, got {3}'
+            .format(name, key, expected, actual))
+        self.key = key
+        self.name = name
+        self.expected = expected
+        self.actual = actual
+
+
+class _CRC32C(object):
+    """A hashlib like interface over the optional crc32c package"""
+
+    def __init__(self):
+        # Imported on first use, to keep importing spongeblob cheap
+        try:
+            from crc32c import crc32c
+        except ImportError:
+            raise ValueError('crc32c checksums require the crc32c package, '
+                             'installed with pip install spongeblob[crc32c]')
+        self._crc32c = crc32c
+        self._value = 0
+
+    def update(self, data):
+        self._value = self._crc32c(data, self._value)
+
+    def hexdigest(self):
+        return '{0:08x}'.format(self._value)
+
+
+def new_checksum(name):
+    """Create a checksum object with `update` and `hexdigest` methods
+
+    :param str name: One of `CHECKSUMS`
+    :returns: A checksum object
+    :raises ValueError: If the checksum is not supported
+
+    """
+    if name == 'md5':
+        return hashlib.md5()
+    elif name == 'crc32c':
+        return _CRC32C()
+    raise ValueError('Unsupported checksum "{0}"'.format(name))
+
+
+def file_checksum(path, name, codec=None, block_size=1024 * 1024):
+    """Compute a checksum of a file on local filesystem
+
+    :param str path: Path of the file on local filesystem
+    :param str name: One of `CHECKSUMS`
+    :param str codec: If set, the checksum is computed on the data of the file
+                      decompressed with this codec
+    :param int block_size: Size in bytes of blocks read at a time
+    :returns: Hex digest of the checksum
+    :rtype: str
+
+    """
+    checksum = new_checksum(name)
+    decompressor = _decompressor(codec) if codec else None
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            if decompressor is not None:
+                block = decompressor.decompress(block)
+            checksum.update(block)
+    if decompressor is not None:
+        checksum.update(decompressor.flush())
+    return checksum.hexdigest()
+
+
+def stored_checksum(metadata):
+    """Find a checksum stored by spongeblob in metadata of an object
+
+    :param dict metadata: Metadata of an object
+    :returns: Name and hex digest of the checksum, or None if there is none
+    :rtype: tuple(str, str)
+
+    """
+    for name in CHECKSUMS:
+        value = get_metadata(metadata, checksum_metadata_key(name))
+        if value is not None:
+            return name, value
+    return None
+
+
+class HashingReader(io.RawIOBase):
+    """A non seekable file object reading from another file object, which
+    updates a checksum with data as it is read. Being non seekable, sdks read
+    it sequentially even when uploading parts concurrently."""
+
+    def __init__(self, fileobj, name):
+        super(HashingReader, self).__init__()
+        self._fileobj = fileobj
+        self.checksum = new_checksum(name)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        self.checksum.update(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def hexdigest(self):
+        return self.checksum.hexdigest()
+
+
+class HashingWriter(io.RawIOBase):
+    """A seekable file object writing to another seekable file object, which
+    updates a checksum with data as it is written. Sdks downloading ranges
+    concurrently write them out of order, so data written ahead of the
+    checksummed offset is kept until the data before it is written. Once more
+    than `max_pending` bytes are kept, they are dropped and hashing stops, so
+    that the written file has to be hashed again after it is complete."""
+
+    def __init__(self, fileobj, name, max_pending=MAX_PENDING_BYTES):
+        super(HashingWriter, self).__init__()
+        self._fileobj = fileobj
+        self.checksum = new_checksum(name)
+        self.max_pending = max_pending
+        self.overflowed = False
+        self._position = fileobj.tell()
+        self._hashed = self._position
+        self._pending = {}
+        self._pending_bytes = 0
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._position = self._fileobj.seek(offset, whence)
+        if self._position is None:
+            # Python 2 file objects return None from seek
+            self._position = self._fileobj.tell()
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def write(self, b):
+        data = bytes(b)
+        self._fileobj.write(data)
+        offset = self._position
+        self._position += len(data)
+        if self.overflowed:
+            return len(b)
+        if offset < self._hashed:
+            # A range written again, like on retries of a part
+            data = data[self._hashed - offset:]
+            offset = self._hashed
+        if data:
+            self._pending_bytes += len(data) - len(self._pending.get(offset,
+                                                                      b''))
+            self._pending[offset] = data
+        while self._hashed in self._pending:
+            data = self._pending.pop(self._hashed)
+            self._pending_bytes -= len(data)
+            self.checksum.update(data)
+            self._hashed += len(data)
+        if self._pending_bytes > self.max_pending:
+            self._pending = {}
+            self._pending_bytes = 0
+            self.overflowed = True
+        return len(b)
+
+    def flush(self):
+        self._fileobj.flush()
+
+    def hexdigest(self):
+        """Checksum of the data written, or None if some of it was written
+        beyond a gap in the data, or hashing stopped past `max_pending` bytes"""
+        if self._pending or self.overflowed:
+            return None
+        return self.checksum.hexdigest()
@@ -0,0 +1,87 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def credentials_key(*credentials):
+    """Digest of credentials, for keys of pooled clients which do not hold
+    secrets in plain text"""
+    digest = hashlib.sha256()
+    for credential in credentials:
+        digest.update(repr(credential).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ClientPool(object):
+    """A thread safe registry of sdk clients, shared by storages created with
+    identical credentials and configuration, so that they reuse connections
+    of a single connection pool instead of setting up their own. Size of the
+    connection pool of each client is `max_pool_connections` of the transfer
+    profile of storages.
+
+    Clients not handed out for `idle_timeout` seconds, and least recently
+    handed out clients beyond `max_clients`, are dropped from the registry.
+    Storages already using a dropped client keep using it.
+    """
+
+    def __init__(self, max_clients=32, idle_timeout=600):
+        """
+        :param int max_clients: Maximum number of clients kept in the registry.
+                                Clients are not shared if set to 0
+        :param int idle_timeout: Seconds after which a client not handed out
+                                 is dropped from the registry
+        """
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # Maps keys to [client, last_used], least recently used first
+        self._clients = OrderedDict()
+
+    def get(self, key, factory):
+        """Return the client registered for a key, or create and register one
+
+        :param tuple key: A hashable key identifying credentials and
+                          configuration of the client
+        :param callable factory: Called without arguments to create a client
+        :returns: A client
+        """
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.pop(key, None)
+            if entry is None:
+                # NOTE: clients are created holding the lock, as creating
+                # boto3 clients from the default session is not thread safe
+                entry = [factory(), now]
+                logger.debug("Created pooled client for {0}".format(key[0]))
+            entry[1] = now
+            if self.max_clients > 0:
+                self._clients[key] = entry
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return entry[0]
+
+    def _evict_idle(self, now):
+        """Drop clients idle for more than idle_timeout, expects the lock to
+        be held"""
+        for key, (_, last_used) in list(self._clients.items()):
+            if now - last_used <= self.idle_timeout:
+                break
+            del self._clients[key]
+
+    def clear(self):
+        """Drop all clients from the registry"""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+
+# Registry used by storages unless they are passed another one
+DEFAULT_CLIENT_POOL = ClientPool()
@@ -0,0 +1,113 @@
+import io
+import zlib
+
+# Metadata key for the codec objects are encoded with
+CODEC_METADATA_KEY = 'spongeblob_codec'
+
+CODECS = ('gzip', 'zstd')
+
+# zlib window bits for streams with a gzip header and trailer
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _zstandard():
+    """Import the optional zstandard package on first use, to keep importing
+    spongeblob cheap"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError('zstd codec requires the zstandard package, '
+                         'installed with pip install spongeblob[zstd]')
+    return zstandard
+
+
+def _check_codec(codec):
+    if codec not in CODECS:
+        raise ValueError('Unsupported codec "{0}"'.format(codec))
+
+
+def _compressor(codec):
+    _check_codec(codec)
+    if codec == 'gzip':
+        return zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+    return _zstandard().ZstdCompressor().compressobj()
+
+
+def _decompressor(codec):
+    _check_codec(codec)
+    if codec == 'gzip':
+        return zlib.decompressobj(GZIP_WBITS)
+    return _zstandard().ZstdDecompressor().decompressobj()
+
+
+class CompressingReader(io.RawIOBase):
+    """A non seekable file object reading from another file object, which
+    returns its data compressed with a codec. Source data is read in blocks
+    as compressed data is read, so only a block and the compressed data not
+    read yet are held in memory."""
+
+    def __init__(self, fileobj, codec, block_size=1024 * 1024):
+        """
+        :param file fileobj: A readable file object with the data to compress
+        :param str codec: One of `CODECS`
+        :param int block_size: Size in bytes of blocks read from the file object
+        """
+        super(CompressingReader, self).__init__()
+        self._fileobj = fileobj
+        self._compressor = _compressor(codec)
+        self.block_size = block_size
+        self._buffer = bytearray()
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while not self._eof and (size is None or size < 0 or
+                                 len(self._buffer) < size):
+            block = self._fileobj.read(self.block_size)
+            if block:
+                self._buffer += self._compressor.compress(block)
+            else:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+class DecodingWriter(io.RawIOBase):
+    """A non seekable file object writing data decompressed with a codec to
+    another file object, as compressed data is written to it. Call `finish`
+    once all data is written."""
+
+    def __init__(self, fileobj, codec):
+        """
+        :param file fileobj: A writable file object for the decompressed data
+        :param str codec: One of `CODECS`
+        """
+        super(DecodingWriter, self).__init__()
+        self._fileobj = fileobj
+        self._decompressor = _decompressor(codec)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = self._decompressor.decompress(bytes(b))
+        if data:
+            self._fileobj.write(data)
+        return len(b)
+
+    def finish(self):
+        """Write out data remaining in the decompressor"""
+        data = self._decompressor.flush()
+        if data:
+            self._fileobj.write(data)
@@ -0,0 +1,94 @@
+from ..utils import chunked, map_ordered
+
+
+class CopyFailedError(Exception):
+    """Raised when a server side copy ends up failed or aborted"""
+
+    def __init__(self, source_key, destination_key, status, description=None):
+        super(CopyFailedError, self).__init__(
+            'Copy {0} -> {1} {2}: {3}'.format(source_key, destination_key,
+                                              status, description))
+        self.source_key = source_key
+        self.destination_key = destination_key
+        self.status = status
+        self.description = description
+
+
+class CopyHandle(object):
+    """Tracks a server side copy started by `Storage.start_copy`. The status
+    of a copy is one of pending, success, failed or aborted, and is updated by
+    `Storage.wait_copies`."""
+
+    def __init__(self, source_key, destination_key, copy_id=None,
+                 status='success', description=None):
+        """
+        :param str source_key: Source key for the object copied
+        :param str destination_key: Destination key of the copy
+        :param str copy_id: Identifier of the copy for providers copying asynchronously
+        :param str status: Status of the copy
+        :param str description: Cause of failure of a failed copy
+        """
+        self.source_key = source_key
+        self.destination_key = destination_key
+        self.copy_id = copy_id
+        self.status = status
+        self.description = description
+
+    @property
+    def done(self):
+        return self.status != 'pending'
+
+    @property
+    def succeeded(self):
+        return self.status == 'success'
+
+    def raise_for_status(self):
+        """Raise `CopyFailedError` if the copy failed or was aborted"""
+        if self.done and not self.succeeded:
+            raise CopyFailedError(self.source_key, self.destination_key,
+                                  self.status, self.description)
+
+    def result(self):
+        """Describe the copy as a dict like results of `Storage.copy_keys`"""
+        return {'source_key': self.source_key,
+                'destination_key': self.destination_key,
+                'copied': self.succeeded,
+                'error': None if self.succeeded else
+                '{0}: {1}'.format(self.status, self.description)}
+
+    def __repr__(self):
+        return "CopyHandle({0} -> {1}, {2})".format(
+            self.source_key, self.destination_key, self.status)
+
+
+def copy_in_batches(start_copy, wait_copies, keys, metadata, workers,
+                    batch_size):
+    """Copy objects on server side, starting copies with `start_copy` on
+    `workers` threads as keys are consumed, waiting for each batch of
+    `batch_size` copies with `wait_copies`, and streaming back the result of
+    each copy. Errors starting a copy are reported in its result. This is
+    shared by `copy_keys` of storages and their wrappers.
+
+    :param start_copy: A function starting a copy like `Storage.start_copy`
+    :param wait_copies: A function waiting for copies like `Storage.wait_copies`
+    :param keys: An iterable of tuples of source key and destination key
+    :param dict metadata: Metadata to be stored along with each object
+    :param int workers: Number of threads starting copies
+    :param int batch_size: Number of copies waited for at once
+    :returns: A generator of dict describing result of each copy, in the
+              order of keys
+    :rtype: Iterator[dict]
+
+    """
+    def start(keys):
+        source_key, destination_key = keys
+        try:
+            return start_copy(source_key, destination_key, metadata=metadata)
+        except Exception as e:
+            return CopyHandle(source_key, destination_key, status='failed',
+                              description=str(e))
+
+    handles = map_ordered(start, keys, workers=workers)
+    for batch in chunked(handles, batch_size):
+        for handle in wait_copies(batch):
+            yield handle.result()
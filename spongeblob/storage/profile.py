@@ -0,0 +1,94 @@
+MB = 1024 * 1024
+
+
+class TransferProfile(object):
+    """A provider neutral set of transfer tuning parameters. Storage providers
+    map it onto their clients: S3 onto a boto3 `TransferConfig` for managed
+    transfers and a botocore `Config` for connections, WABS onto
+    `max_connections`, block sizes and `socket_timeout` of the azure sdk.
+    Parallel downloads and blob writers of spongeblob use it for their
+    defaults as well.
+
+    A few presets are available via :py:meth:`TransferProfile.from_preset`:
+
+    - `default`: Defaults of boto3, also suitable for most workloads
+    - `many_small_objects`: Single requests for objects upto 64MB, short
+      timeouts and a big connection pool for many concurrent transfers
+    - `few_huge_objects`: Big parts transferred with high concurrency, and
+      longer read timeouts for them
+    """
+
+    PRESETS = {
+        'default': {},
+        'many_small_objects': {'multipart_threshold': 64 * MB,
+                               'max_concurrency': 4,
+                               'connect_timeout': 10,
+                               'read_timeout': 30,
+                               'max_pool_connections': 50},
+        'few_huge_objects': {'part_size': 64 * MB,
+                             'multipart_threshold': 64 * MB,
+                             'max_concurrency': 16,
+                             'connect_timeout': 10,
+                             'read_timeout': 120,
+                             'max_pool_connections': 32},
+    }
+
+    def __init__(self, part_size=8 * MB, multipart_threshold=8 * MB,
+                 max_concurrency=10, connect_timeout=60, read_timeout=60,
+                 max_pool_connections=10):
+        """
+        :param int part_size: Size in bytes of parts, blocks or ranges transferred by a single request
+        :param int multipart_threshold: Size in bytes above which objects are transferred in parts
+        :param int max_concurrency: Maximum number of parts of an object transferred concurrently
+        :param int connect_timeout: Seconds to wait for a connection to be established
+        :param int read_timeout: Seconds to wait for data to be read from a connection
+        :param int max_pool_connections: Maximum number of connections kept in the connection pool
+        """
+        self.part_size = part_size
+        self.multipart_threshold = multipart_threshold
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_pool_connections = max_pool_connections
+
+    @classmethod
+    def from_preset(cls, name, **overrides):
+        """Create a profile from a preset, optionally overriding some parameters
+
+        :param str name: Name of the preset, one of the keys of `PRESETS`
+        :param \**overrides: Parameters of `__init__` to override
+        :returns: A transfer profile
+        :rtype: TransferProfile
+
+        """
+        try:
+            params = dict(cls.PRESETS[name])
+        except KeyError:
+            raise ValueError('Unsupported transfer profile preset "{0}"'
+                             .format(name))
+        params.update(overrides)
+        return cls(**params)
+
+    @classmethod
+    def get(cls, profile=None):
+        """Normalize a profile argument of storage classes
+
+        :param profile: A transfer profile, a preset name, or None for the default profile
+        :type profile: Union[TransferProfile, str, None]
+        :returns: A transfer profile
+        :rtype: TransferProfile
+
+        """
+        if profile is None:
+            return cls()
+        elif isinstance(profile, cls):
+            return profile
+        return cls.from_preset(profile)
+
+    def __repr__(self):
+        return ("TransferProfile(part_size={0}, multipart_threshold={1}, "
+                "max_concurrency={2}, connect_timeout={3}, read_timeout={4}, "
+                "max_pool_connections={5})"
+                .format(self.part_size, self.multipart_threshold,
+                        self.max_concurrency, self.connect_timeout,
+                        self.read_timeout, self.max_pool_connections))
@@ -1,8 +1,14 @@
 import logging
 
-from .storage import Storage
+from .storage import Storage, Page
+from .profile import TransferProfile
+from .client_pool import DEFAULT_CLIENT_POOL, credentials_key
+from .checksum import ChecksumMismatchError
 import boto3
-from botocore.exceptions import EndpointConnectionError
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from botocore.exceptions import ClientError, EndpointConnectionError
 from ssl import SSLError
 
 logger = logging.getLogger(__name__)
@@ -14,7 +20,11 @@ class S3(Storage):
     Storage base class
     """
 
-    def __init__(self, aws_key, aws_secret, bucket_name, boto_config=None):
+    MIN_PART_SIZE = 5 * 1024 * 1024
+    KEY_MARKERS = True
+
+    def __init__(self, aws_key, aws_secret, bucket_name, boto_config=None,
+                 metadata_workers=8, transfer_profile=None, client_pool=None):
         """Setup a S3 storage client object
 
         :param str aws_key: AWS key for the S3 bucket
@@ -22,17 +32,45 @@ class S3(Storage):
         :param str bucket_name: AWS S3 bucket name to connect to
         :param botocore.client.Config boto_config: Expects a botocore.client.Config object
                                                    for boto s3 client connection configuration
+        :param int metadata_workers: Number of threads used to fetch object metadata
+                                     concurrently when listing with ``metadata=True``
+        :param transfer_profile: A TransferProfile or the name of a preset, mapped onto
+                                 boto3 TransferConfig for managed transfers and onto
+                                 botocore Config for connections
+        :type transfer_profile: Union[TransferProfile, str]
+        :param ClientPool client_pool: Registry of clients to share the boto s3 client from.
+                                       Defaults to a registry shared by all storages
 
         """
         self.bucket_name = bucket_name
+        self.metadata_workers = metadata_workers
         self.default_extra_args = {'ServerSideEncryption': 'AES256'}
-
-        # NOTE: default botocore config values will be used if boto_config
-        # is passed as `None`
-        self.client = boto3.client('s3',
-                                   aws_access_key_id=aws_key,
-                                   aws_secret_access_key=aws_secret,
-                                   config=boto_config)
+        self.transfer_profile = TransferProfile.get(transfer_profile)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.transfer_profile.multipart_threshold,
+            multipart_chunksize=self.transfer_profile.part_size,
+            max_concurrency=self.transfer_profile.max_concurrency)
+
+        # NOTE: values set in boto_config take precedence over values of
+        # the transfer profile
+        client_config = Config(
+            connect_timeout=self.transfer_profile.connect_timeout,
+            read_timeout=self.transfer_profile.read_timeout,
+            max_pool_connections=self.transfer_profile.max_pool_connections)
+        if boto_config is not None:
+            client_config = client_config.merge(boto_config)
+        if client_pool is None:
+            client_pool = DEFAULT_CLIENT_POOL
+        # NOTE: botocore Config objects are not hashable, so values of their
+        # options are part of the key instead
+        client_key = ('s3', credentials_key(aws_key, aws_secret),
+                      tuple((name, repr(getattr(client_config, name)))
+                            for name in sorted(Config.OPTION_DEFAULTS)))
+        self.client = client_pool.get(
+            client_key, lambda: boto3.client('s3',
+                                             aws_access_key_id=aws_key,
+                                             aws_secret_access_key=aws_secret,
+                                             config=client_config))
         logger.debug("Created s3 client object: {0}".format(self.client))
 
     @classmethod
@@ -44,10 +82,14 @@ class S3(Storage):
         :rtype: tuple
 
         """
-        if method_name.startswith('upload_file'):
+        if method_name.startswith('upload_'):
             return (SSLError,
                     EndpointConnectionError,
                     boto3.exceptions.S3UploadFailedError)
+        elif method_name.startswith('download_'):
+            return (SSLError,
+                    EndpointConnectionError,
+                    ChecksumMismatchError)
         else:
             return (SSLError,
                     EndpointConnectionError)
@@ -76,61 +118,234 @@ class S3(Storage):
         """
         return '{}/{}/'.format(self.client.meta.endpoint_url, self.bucket_name)
 
-    def list_object_keys(self, prefix='', metadata=False, pagesize=1000):
-        """List object keys matching a prefix for the S3 client
+    def _list_pages(self, prefix, metadata=False, pagesize=1000,
+                    delimiter=None, marker=None):
+        """List pages of objects matching a prefix for the S3 client
 
         :param str prefix: A prefix string to list objects
         :param bool metadata: If set to True, object metadata will be fetched with object. Default is False
         :param int pagesize: Maximum objects to be fetched in a single S3 api call. This is limited to upto 1000 objects in S3
-        :returns: A generator of object dictionary with key, size and last_modified keys. Metadata will be fetched if set to True
-        :rtype: Iterator[dict]
+        :param str delimiter: If set, keys are rolled up into common prefixes at the delimiter
+        :param str marker: Key after which to start listing, as the marker of a page
+        :returns: A generator of pages of object dictionary with key, size and last_modified keys. Metadata will be fetched if set to True
+        :rtype: Iterator[Page]
 
         """
         logger.debug("Listing files for prefix: {0}".format(prefix))
 
+        list_args = {'Bucket': self.bucket_name, 'Prefix': prefix,
+                     'PaginationConfig': {'PageSize': pagesize}}
+        if delimiter:
+            list_args['Delimiter'] = delimiter
+        if marker:
+            list_args['Marker'] = marker
         paginator = self.client.get_paginator('list_objects')
-        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix,
-                                       PaginationConfig={'PageSize': pagesize}):
-            if page['Marker']:
+        pages = paginator.paginate(**list_args)
+        if metadata:
+            pages = self._with_metadata(pages)
+
+        for page in pages:
+            if marker:
                 logger.debug("Paging objects "
-                             "from marker '{0}'".format(page['Marker']))
-            for obj in page.get('Contents', []):
-                obj_metadata = None
-                if metadata:
-                    obj_metadata = self.client.head_object(
-                        Bucket=self.bucket_name,
-                        Key=obj['Key'])['Metadata']
-
-                yield {'key': obj['Key'],
-                       'last_modified': obj['LastModified'],
-                       'size': obj['Size'],
-                       'metadata': obj_metadata}
-
-    def download_file(self, source_key, destination_file):
+                             "from marker '{0}'".format(marker))
+            yield Page(marker or None,
+                       [{'key': obj['Key'],
+                         'last_modified': obj['LastModified'],
+                         'size': obj['Size'],
+                         'metadata': obj.get('Metadata')}
+                        for obj in page.get('Contents', [])],
+                       [common_prefix['Prefix'] for common_prefix
+                        in page.get('CommonPrefixes', [])])
+            # Marker of the next page, the way the paginator computes it
+            if page.get('Contents') or page.get('NextMarker'):
+                marker = (page.get('NextMarker') or
+                          page['Contents'][-1]['Key'])
+
+    def _head_metadata(self, key):
+        """Fetch user metadata of a single object with a HEAD request
+
+        :param str key: Key of the object
+        :returns: Metadata dict of the object
+        :rtype: dict
+
+        """
+        return self.client.head_object(Bucket=self.bucket_name,
+                                       Key=key)['Metadata']
+
+    def _with_metadata(self, pages):
+        """Attach metadata to the objects of every listing page. HEAD requests
+        for a page are submitted to a thread pool as soon as the page is
+        listed, while the previous page is handed to the caller. At most two
+        pages of HEAD requests are pending at any point of time.
+
+        :param pages: An iterator of list_objects response pages
+        :returns: A generator of pages, with a `Metadata` key set on each object
+        :rtype: Iterator[dict]
+
+        """
+        executor = ThreadPoolExecutor(max_workers=self.metadata_workers)
+        futures = []
+        try:
+            pending = None
+            for page in pages:
+                futures = [executor.submit(self._head_metadata, obj['Key'])
+                           for obj in page.get('Contents', [])]
+                if pending is not None:
+                    yield self._resolve_metadata(*pending)
+                pending = (page, futures)
+            if pending is not None:
+                yield self._resolve_metadata(*pending)
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _resolve_metadata(page, futures):
+        """Wait for HEAD requests of a page and set `Metadata` on its objects"""
+        for obj, future in zip(page.get('Contents', []), futures):
+            obj['Metadata'] = future.result()
+        return page
+
+    def get_object_properties(self, key, metadata=False):
+        """Fetch object properties and optionally metadata from S3 with a HEAD
+        request. If the object is not found return None.
+
+        :param str key: Key for object for which you want to fetch metdata and properties
+        :param bool metadata: If set to True, metadata will be returned, else not.
+        :returns: A dictionary object with key, size, last_modified and metadata keys
+        :rtype: dict
+
+        """
+        if not key:
+            return None
+        try:
+            response = self.client.head_object(Bucket=self.bucket_name,
+                                               Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return {'key': key,
+                'last_modified': response['LastModified'],
+                'size': response['ContentLength'],
+                'metadata': response['Metadata'] if metadata else None}
+
+    def download_file(self, source_key, destination_file,
+                      verify_checksum=False, decode=True):
         """Download an object from S3 bucket to local filesystem
 
         :param str source_key: Key for object to be downloaded
         :param str destination_file: Path on local filesystem to download file
+        :param bool verify_checksum: If set to True, the checksum stored along with
+                                     the object on upload is computed on the
+                                     downloaded data and verified. Objects
+                                     without a checksum are not verified
+        :param bool decode: If set to True, objects uploaded with a codec are
+                            decompressed while downloading, looking up the
+                            codec in metadata returned with the first part of
+                            the object. Parts are then fetched with concurrent
+                            ranged requests. If set to False, objects are
+                            downloaded as stored, and with `verify_checksum`
+                            the downloaded file of an object with a codec is
+                            decompressed once more to verify the checksum
         :returns: Nothing
         :rtype: None
 
         """
+        if verify_checksum or decode:
+            return self._download_decoded(source_key, destination_file,
+                                          verify_checksum, decode)
         logger.debug("Downloading blob from prefix {0} to file {1}"
                      .format(source_key, destination_file))
         self.client.download_file(self.bucket_name,
                                   source_key,
-                                  destination_file)
+                                  destination_file,
+                                  Config=self.transfer_config)
 
-    def upload_file(self, destination_key, source_file, metadata=None):
+    def download_file_obj(self, source_key, destination_fd):
+        """Download an object from S3 bucket to a file object
+
+        :param str source_key: Key for object to be downloaded
+        :param file destination_fd: A writable file object to download object into
+        :returns: Nothing
+        :rtype: None
+
+        """
+        logger.debug("Downloading blob from prefix {0} to stream {1}"
+                     .format(source_key, destination_fd))
+        self.client.download_fileobj(self.bucket_name,
+                                     source_key,
+                                     destination_fd,
+                                     Config=self.transfer_config)
+
+    def _object_size(self, key):
+        """Fetch size of an object in bytes with a HEAD request"""
+        return self.client.head_object(Bucket=self.bucket_name,
+                                       Key=key)['ContentLength']
+
+    def _read_range(self, key, start, end):
+        """Fetch an inclusive byte range of an object"""
+        response = self.client.get_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Range='bytes={0}-{1}'.format(start, end))
+        return response['Body'].read()
+
+    def _read_first_range(self, key, end):
+        """Fetch bytes of an object from its start upto an offset, along with
+        size and metadata of the object, with a single GET request"""
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Range='bytes=0-{0}'.format(end))
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidRange':
+                raise
+            # Ranges of empty objects are not satisfiable
+            response = self.client.get_object(Bucket=self.bucket_name,
+                                              Key=key)
+        content_range = response.get('ContentRange')
+        size = (int(content_range.rsplit('/', 1)[1]) if content_range
+                else response['ContentLength'])
+        return response['Body'].read(), size, response['Metadata']
+
+    def upload_file(self, destination_key, source_file, metadata=None,
+                    skip_if_identical=False, checksum=None, codec=None):
         """Upload a file from local filesystem to S3
 
         :param str destination_key: Key where to store object
         :param str source_file: Path on local file system for file to be uploaded
         :param dict metadata: Metadata to be stored along with object
-        :returns: Nothing
-        :rtype: None
+        :param bool skip_if_identical: If set to True, the upload is skipped if the
+                                       ETag of the object matches the file
+        :param str checksum: If set to md5 or crc32c, the checksum is computed on
+                             the data read for the upload and stored in
+                             object metadata once the upload completes, by
+                             copying the object onto itself. The copy changes
+                             the ETag of the object, is a multipart copy for
+                             objects over the multipart threshold, and until it
+                             completes the object exists without the checksum
+        :param str codec: If set to gzip or zstd, the data is compressed while
+                          uploading, and the codec stored in object metadata
+        :returns: True if the file was uploaded, False if the upload was skipped
+        :rtype: bool
 
         """
+        if skip_if_identical:
+            identical, metadata = self._check_identical(destination_key,
+                                                        source_file, metadata,
+                                                        codec)
+            if identical:
+                logger.debug("Skipping upload of file {0} identical to {1}"
+                             .format(source_file, destination_key))
+                return False
+        if checksum or codec:
+            with open(source_file, 'rb') as f:
+                self._upload_encoded(destination_key, f, metadata,
+                                     checksum, codec)
+            return True
         metadata = metadata or {}
         logger.debug("Uploading file {0} to prefix {1}"
                      .format(source_file, destination_key))
@@ -139,18 +354,61 @@ class S3(Storage):
                         source_file,
                         self.bucket_name,
                         destination_key,
-                        ExtraArgs=self._make_extra_args(metadata))
+                        ExtraArgs=self._make_extra_args(metadata),
+                        Config=self.transfer_config)
+        return True
+
+    def _stored_checksums(self, key):
+        """Fetch the ETag of an object with a HEAD request. The ETag is the
+        md5 of objects uploaded with a single request, unless encrypted with
+        KMS keys, and a digest of md5 of parts for multipart uploads
 
-    def upload_file_obj(self, destination_key, source_fd, metadata=None):
+        :param str key: Key for object
+        :returns: A dict with size, md5, multipart_etag and metadata keys
+        :rtype: dict
+
+        """
+        try:
+            response = self.client.head_object(Bucket=self.bucket_name,
+                                               Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        etag = response['ETag'].strip('"')
+        stored = {'size': response['ContentLength'],
+                  'md5': None,
+                  'multipart_etag': None,
+                  'metadata': response['Metadata']}
+        if '-' in etag:
+            stored['multipart_etag'] = etag
+        elif response.get('ServerSideEncryption') != 'aws:kms':
+            stored['md5'] = etag
+        return stored
+
+    def upload_file_obj(self, destination_key, source_fd, metadata=None,
+                        checksum=None, codec=None):
         """Upload a file from file object to S3
 
         :param str destination_key: Key where to store object
         :param file source_fd: A file object to be uploaded
         :param dict metadata: Metadata to be stored along with object
+        :param str checksum: If set to md5 or crc32c, the checksum is computed on
+                             the data read for the upload and stored in
+                             object metadata once the upload completes, by
+                             copying the object onto itself. The copy changes
+                             the ETag of the object, is a multipart copy for
+                             objects over the multipart threshold, and until it
+                             completes the object exists without the checksum
+        :param str codec: If set to gzip or zstd, the data is compressed while
+                          uploading, and the codec stored in object metadata
         :returns: Nothing
         :rtype: None
 
         """
+        if checksum or codec:
+            return self._upload_encoded(destination_key, source_fd,
+                                        metadata, checksum, codec)
         metadata = metadata or {}
         logger.debug("Uploading stream {0} to prefix {1}"
                      .format(source_fd, destination_key))
@@ -159,7 +417,38 @@ class S3(Storage):
                         source_fd,
                         self.bucket_name,
                         destination_key,
-                        ExtraArgs=self._make_extra_args(metadata))
+                        ExtraArgs=self._make_extra_args(metadata),
+                        Config=self.transfer_config)
+
+    def _create_multipart(self, key, metadata=None):
+        """Start a S3 multipart upload and return its upload id"""
+        return self.client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            **self._make_extra_args(metadata))['UploadId']
+
+    def _upload_part(self, key, upload, part_number, data):
+        """Upload a part of a S3 multipart upload"""
+        response = self.client.upload_part(Bucket=self.bucket_name,
+                                           Key=key,
+                                           UploadId=upload,
+                                           PartNumber=part_number,
+                                           Body=data)
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def _complete_multipart(self, key, upload, parts, metadata=None):
+        """Complete a S3 multipart upload. Metadata was set on its creation"""
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload,
+            MultipartUpload={'Parts': parts})
+
+    def _abort_multipart(self, key, upload):
+        """Abort a S3 multipart upload, discarding its parts"""
+        self.client.abort_multipart_upload(Bucket=self.bucket_name,
+                                           Key=key,
+                                           UploadId=upload)
 
     def copy_from_key(self, source_key, destination_key, metadata=None):
         """Copy a S3 object from one key to another key on server side
@@ -179,7 +468,17 @@ class S3(Storage):
                                      'Key': source_key},
                          Bucket=self.bucket_name,
                          Key=destination_key,
-                         ExtraArgs=self._make_extra_args(metadata))
+                         ExtraArgs=self._make_extra_args(metadata),
+                         Config=self.transfer_config)
+
+    def _update_metadata(self, key, metadata):
+        """Replace metadata of a S3 object by copying it onto itself"""
+        self.client.copy(CopySource={'Bucket': self.bucket_name, 'Key': key},
+                         Bucket=self.bucket_name,
+                         Key=key,
+                         ExtraArgs=dict(self._make_extra_args(metadata),
+                                        MetadataDirective='REPLACE'),
+                         Config=self.transfer_config)
 
     def delete_key(self, destination_key):
         """Delete an object from S3
@@ -192,3 +491,24 @@ class S3(Storage):
         logger.debug("Deleting key {0}".format(destination_key))
         return self.client.delete_object(Bucket=self.bucket_name,
                                          Key=destination_key)
+
+    def delete_batch(self, keys):
+        """Delete upto 1000 objects from S3 with a single DeleteObjects call
+
+        :param list[str] keys: Keys of objects to be deleted
+        :returns: A list of dict with key, deleted and error keys for each key
+        :rtype: list[dict]
+
+        """
+        logger.debug("Deleting {0} keys".format(len(keys)))
+        response = self.client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={'Objects': [{'Key': key} for key in keys],
+                    'Quiet': True})
+        errors = {error['Key']: '{0}: {1}'.format(error['Code'],
+                                                 error['Message'])
+                  for error in response.get('Errors', [])}
+        return [{'key': key,
+                 'deleted': key not in errors,
+                 'error': errors.get(key)}
+                for key in keys]
@@ -1,8 +1,105 @@
+import io
+import os
+import time
+import logging
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from .blobio import BlobReader, BlobWriter
+from .checksum import (ChecksumMismatchError,
+                       HashingReader,
+                       HashingWriter,
+                       checksum_metadata_key,
+                       file_checksum,
+                       stored_checksum)
+from .codec import CODEC_METADATA_KEY, CompressingReader, DecodingWriter
+from .copies import CopyHandle, copy_in_batches
+from .profile import TransferProfile
+from ..utils import (prefetch as prefetch_pages,
+                     interleave,
+                     chunked,
+                     map_ordered,
+                     write_at,
+                     file_checksums,
+                     get_metadata)
+
+logger = logging.getLogger(__name__)
+
+
+class Page(namedtuple('Page', ['marker', 'objects', 'prefixes'])):
+    """A single page of a listing api call. `marker` is the continuation
+    marker with which the page was requested, and is None for the first page.
+    `objects` is a list of object dicts as returned by `list_object_keys`, and
+    `prefixes` is a list of common prefixes when listing with a delimiter"""
+    __slots__ = ()
+
+    def entries(self):
+        """Object dicts of the page, and `{"prefix": <common_prefix>}` dicts
+        for its common prefixes, in lexicographical order of keys and
+        prefixes"""
+        if not self.prefixes:
+            return self.objects
+        return sorted(self.objects +
+                      [{'prefix': prefix} for prefix in self.prefixes],
+                      key=entry_name)
+
+
+def entry_name(entry):
+    """Key of an object dict, or prefix of a common prefix dict, of a listing"""
+    return entry['key'] if 'key' in entry else entry['prefix']
+
+
+def key_range_boundaries(prefix, keys, count):
+    """Keys splitting the keys after the last of sorted `keys` into ranges.
+    Keys are unknown until listed, so boundaries are the last key cut after
+    each position past the prefix, followed by each character found in `keys`
+    sorting after the character of the last key at that position. Ranges are
+    thus narrow close to the last key and wider further from it.
+
+    :param str prefix: Prefix of the keys
+    :param list[str] keys: Sorted keys listed so far
+    :param int count: Number of boundaries wanted, more may be returned
+    :returns: Sorted boundaries, all greater than the last key
+    :rtype: list[str]
+
+    """
+    last_key = keys[-1]
+    alphabet = sorted(set(''.join(key[len(prefix):] for key in keys)))
+    boundaries = []
+    for position in range(len(prefix), len(last_key)):
+        boundaries.extend(last_key[:position] + char for char in alphabet
+                          if char > last_key[position])
+        if len(boundaries) >= count:
+            break
+    return sorted(boundaries)
+
+
+# Metadata key for the md5 checksum of an object, stored by spongeblob where
+# the checksum of the provider can't be compared with that of a local file
+MD5_METADATA_KEY = 'spongeblob_md5'
+
+
 class Storage(object):
     """
     This is the base class for spongeblob. It defines an interface to be
     implemented by various storages
     """
+    # Maximum number of keys deleted by a single `delete_batch` call
+    DELETE_BATCH_SIZE = 1000
+    # Maximum number of copies started by `copy_keys` before waiting for them,
+    # and number of threads starting them
+    COPY_BATCH_SIZE = 1000
+    COPY_WORKERS = 16
+    # Minimum size in bytes of parts of a multipart upload but the last one,
+    # and maximum number of parts in an upload
+    MIN_PART_SIZE = 1
+    MAX_PARTS = 10000
+    # Whether markers of `_list_pages` are keys after which listing starts,
+    # which lets a listing be split into key ranges listed in parallel
+    KEY_MARKERS = False
+    # Transfer tuning parameters, storage providers set it on initialization
+    transfer_profile = TransferProfile()
 
     @classmethod
     def get_retriable_exceptions(cls, method_name=None):
@@ -15,12 +112,21 @@ class Storage(object):
         """
         return ()
 
-    def list_object_keys(self, prefix='', metadata=False, pagesize=1000):
+    def list_object_keys(self, prefix='', metadata=False, pagesize=1000,
+                         prefetch=0, delimiter=None):
         """List files for the specified prefix. Fetch metdata if set to true
 
         :param str prefix: String to match when searching files
         :param bool metadata: If set to True, metadata will be fetched, else not.
         :param int pagesize: Limits the number of objects fetched in a single api call
+        :param int prefetch: Number of pages to fetch in a background thread ahead
+                             of the consumer. Pages are fetched only on demand if 0
+        :param str delimiter: If set, only objects without the delimiter in their
+                              keys after the prefix are listed, and keys of
+                              other objects are rolled up into their common
+                              prefixes upto the first delimiter, which are
+                              listed as ``{"prefix": <common_prefix>}`` dicts
+                              in order with the objects
         :returns: A generator of dict describing objects found by api.
                   The returned dict will look like this
                   ::
@@ -35,9 +141,202 @@ class Storage(object):
                   be empty dict if there is no metadata.
         :rtype: Iterator[dict]
 
+        """
+        pages = self._list_pages(prefix, metadata=metadata, pagesize=pagesize,
+                                 delimiter=delimiter)
+        if prefetch:
+            pages = prefetch_pages(pages, depth=prefetch)
+        try:
+            for page in pages:
+                for obj in page.entries():
+                    yield obj
+        finally:
+            pages.close()
+
+    def list_prefixes(self, prefix='', delimiter='/', pagesize=1000):
+        """List common prefixes of keys matching a prefix upto the first
+        delimiter after the prefix, like the folders of a directory. Pages are
+        listed with the delimiter, so listing costs pages proportional to the
+        number of common prefixes and of objects directly under the prefix,
+        rather than to the number of all objects under it.
+
+        :param str prefix: String to match when searching files
+        :param str delimiter: Delimiter at which keys are rolled up
+        :param int pagesize: Limits the number of keys and prefixes fetched in a
+                             single api call
+        :returns: A generator of common prefixes, ending with the delimiter
+        :rtype: Iterator[str]
+        :Example:
+            ::
+
+                # Yields 'logs/dt=2018-01-01/', 'logs/dt=2018-01-02/', ...
+                for partition in storage.list_prefixes('logs/dt='):
+                    print(partition)
+
+        """
+        for entry in self.list_object_keys(prefix, pagesize=pagesize,
+                                           delimiter=delimiter):
+            if 'prefix' in entry:
+                yield entry['prefix']
+
+    def _list_pages(self, prefix, metadata=False, pagesize=1000,
+                    delimiter=None, marker=None):
+        """List objects for the specified prefix one api call at a time. This
+        is implemented by storage providers and used by `list_object_keys`
+
+        :param str prefix: String to match when searching files
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :param int pagesize: Limits the number of objects fetched in a single api call
+        :param str delimiter: If set, keys containing the delimiter after the prefix
+                              are rolled up into the common prefixes of the page
+        :param str marker: Continuation marker of a page returned earlier, to
+                           resume listing from that page
+        :returns: A generator of listing pages
+        :rtype: Iterator[Page]
+
         """
         raise NotImplementedError
 
+    def list_object_keys_parallel(self, prefix='', metadata=False,
+                                  pagesize=1000, delimiter='/', shard_depth=1,
+                                  max_workers=8, prefetch=2, ordered=True):
+        """List files for the specified prefix with concurrent api calls. The
+        listing is split into shards which are listed concurrently, each
+        streaming its pages. Where listing markers are keys, the keys after the
+        first pages are split into key ranges, so that flat prefixes are
+        listed in parallel too. Other storages split the prefix with a
+        delimiter listing, every common prefix found being a shard, which is
+        most effective for keys laid out in "directories".
+
+        :param str prefix: String to match when searching files
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :param int pagesize: Limits the number of objects fetched in a single api call
+        :param str delimiter: Delimiter used to split the prefix into shards, for
+                              storages without key markers
+        :param int shard_depth: Number of delimiter levels walked to find shards,
+                                for storages without key markers
+        :param int max_workers: Number of shards listed concurrently
+        :param int prefetch: Number of pages buffered ahead of the consumer per shard
+        :param bool ordered: If set to True, objects are yielded ordered by key as
+                             `list_object_keys` does, else in the order shards
+                             return them
+        :returns: A generator of dict describing objects found by api, same as
+                  returned by `list_object_keys`
+        :rtype: Iterator[dict]
+
+        """
+        if self.KEY_MARKERS:
+            shards = self._key_range_shards(prefix, metadata, pagesize,
+                                            max_workers)
+        else:
+            shards = self._delimiter_shards(prefix, metadata, pagesize,
+                                            delimiter, shard_depth)
+
+        if not ordered:
+            pages = interleave(shards, workers=max_workers,
+                               depth=prefetch * max_workers)
+            try:
+                for page in pages:
+                    for obj in page.objects:
+                        yield obj
+            finally:
+                pages.close()
+            return
+
+        # Shards are generated in order of the keys they hold, and never
+        # overlap. Listing them in order hence yields objects ordered by key,
+        # while up to `max_workers` upcoming shards are listed in background
+        listings = deque(prefetch_pages(shard, depth=prefetch)
+                         for shard in islice(shards, max_workers))
+        try:
+            while listings:
+                for page in listings[0]:
+                    for obj in page.objects:
+                        yield obj
+                listings.popleft()
+                shard = next(shards, None)
+                if shard is not None:
+                    listings.append(prefetch_pages(shard, depth=prefetch))
+        finally:
+            for pages in listings:
+                pages.close()
+            shards.close()
+
+    def _key_range_shards(self, prefix, metadata, pagesize, shards):
+        """Split a listing into key ranges. The first two pages are listed,
+        and keys after them are split at characters found in their keys
+
+        :returns: A generator ordered by key of shards, which are iterables of
+                  pages listing the keys of a range
+        :rtype: Iterator[Iterable[Page]]
+
+        """
+        pages = self._list_pages(prefix, metadata=metadata, pagesize=pagesize)
+        try:
+            sample = list(islice(pages, 2))
+        finally:
+            pages.close()
+        for page in sample:
+            yield [page]
+        # Listing ends with its first page, or with a page with no objects
+        if len(sample) < 2 or not sample[-1].objects:
+            return
+
+        keys = [obj['key'] for page in sample for obj in page.objects]
+        boundaries = key_range_boundaries(prefix, keys, shards * 4)
+        for start, end in zip([keys[-1]] + boundaries, boundaries + [None]):
+            yield self._list_key_range(prefix, metadata, pagesize, start, end)
+
+    def _list_key_range(self, prefix, metadata, pagesize, start, end=None):
+        """List pages of objects matching a prefix with keys after `start`,
+        upto and including `end` if set"""
+        for page in self._list_pages(prefix, metadata=metadata,
+                                     pagesize=pagesize, marker=start):
+            objects = [obj for obj in page.objects
+                       if end is None or obj['key'] <= end]
+            if objects:
+                yield Page(page.marker, objects, [])
+            if len(objects) < len(page.objects):
+                return
+
+    def _delimiter_shards(self, prefix, metadata, pagesize, delimiter,
+                          shard_depth):
+        """Split a listing by walking `shard_depth` levels of the prefix with
+        delimiter listings. Objects found directly under the walked levels
+        are generated a page at a time as they are listed, and common prefixes
+        at the last level are listed as shards
+
+        :returns: A generator ordered by key of shards, which are iterables of
+                  pages
+        :rtype: Iterator[Iterable[Page]]
+
+        """
+        if shard_depth < 1:
+            yield self._list_pages(prefix, metadata=metadata,
+                                   pagesize=pagesize)
+            return
+        last_prefix = None
+        for page in self._list_pages(prefix, metadata=metadata,
+                                     pagesize=pagesize, delimiter=delimiter):
+            objects = []
+            for entry in page.entries():
+                if 'key' in entry:
+                    objects.append(entry)
+                    continue
+                # Some servers repeat common prefixes across pages
+                if last_prefix is not None and entry['prefix'] <= last_prefix:
+                    continue
+                last_prefix = entry['prefix']
+                if objects:
+                    yield [Page(page.marker, objects, [])]
+                    objects = []
+                for shard in self._delimiter_shards(entry['prefix'], metadata,
+                                                    pagesize, delimiter,
+                                                    shard_depth - 1):
+                    yield shard
+            if objects:
+                yield [Page(page.marker, objects, [])]
+
     def list_object_keys_flat(self, *args, **kwargs):
         """Takes arguments of list_object_keys function and returns a list of
         objects instead of generator. This function is retriable unlike
@@ -87,38 +386,467 @@ class Storage(object):
         else:
             return obj_properties
 
-    def download_file(self, source_key, destination_file):
+    def get_object_properties_many(self, keys, metadata=False, max_workers=16):
+        """Fetch properties of many objects with concurrent
+        `get_object_properties` calls
+
+        :param keys: An iterable of keys for objects
+        :param bool metadata: If set to True, metadata will be fetched, else not.
+        :param int max_workers: Maximum number of concurrent calls
+        :returns: A generator of dicts as returned by `get_object_properties`, or
+                  None for objects not found, in the order of keys
+        :rtype: Iterator[dict]
+
+        """
+        return map_ordered(lambda key: self.get_object_properties(
+            key, metadata=metadata), keys, workers=max_workers)
+
+    def download_file(self, source_key, destination_file,
+                      verify_checksum=False, decode=True):
         """Download an object to local filesystem
 
         :param str source_key: Key for object to be downloaded
         :param str destination_file: Path on local filesystem to download file
+        :param bool verify_checksum: If set to True, the checksum stored along with
+                                     the object on upload is computed on the
+                                     downloaded data and verified. Objects
+                                     without a checksum are not verified
+        :param bool decode: If set to True, objects uploaded with a codec are
+                            decompressed while downloading, looking up the
+                            codec in metadata returned with the first part of
+                            the object. Parts are then fetched with concurrent
+                            ranged requests. If set to False, objects are
+                            downloaded as stored, and with `verify_checksum`
+                            the downloaded file of an object with a codec is
+                            decompressed once more to verify the checksum
+        :returns: Nothing
+        :rtype: None
+
+        """
+        raise NotImplementedError
+
+    def download_file_obj(self, source_key, destination_fd):
+        """Download an object to a file object
+
+        :param str source_key: Key for object to be downloaded
+        :param file destination_fd: A writable file object to download object into
         :returns: Nothing
         :rtype: None
 
         """
         raise NotImplementedError
 
-    def upload_file(self, destination_key, source_file, metadata=None):
+    def download_bytes(self, source_key):
+        """Download an object in memory
+
+        :param str source_key: Key for object to be downloaded
+        :returns: Content of the object
+        :rtype: bytes
+
+        """
+        destination_fd = io.BytesIO()
+        self.download_file_obj(source_key, destination_fd)
+        return destination_fd.getvalue()
+
+    def download_file_parallel(self, source_key, destination_file,
+                               part_size=None, max_concurrency=None):
+        """Download an object to local filesystem with concurrent ranged
+        requests. The destination file is preallocated to the object size, and
+        every part is written at its offset as soon as it is fetched, so at
+        most `max_concurrency` parts are held in memory.
+
+        :param str source_key: Key for object to be downloaded
+        :param str destination_file: Path on local filesystem to download file
+        :param int part_size: Size in bytes of the range fetched by a single request.
+                              Defaults to `part_size` of the transfer profile
+        :param int max_concurrency: Maximum number of ranges fetched concurrently.
+                                    Defaults to `max_concurrency` of the transfer profile
+        :returns: A dict with transfer statistics. The returned dict will look like this
+                  ::
+
+                      {"size": <bytes_downloaded>,
+                       "seconds": <time_taken_for_download>,
+                       "throughput": <bytes_per_second>}
+
+        :rtype: dict
+
+        """
+        part_size = part_size or self.transfer_profile.part_size
+        max_concurrency = (max_concurrency or
+                           self.transfer_profile.max_concurrency)
+        started = time.time()
+        size = self._object_size(source_key)
+        logger.debug("Downloading blob from prefix {0} to file {1} "
+                     "in {2} byte parts".format(source_key, destination_file,
+                                                part_size))
+
+        def download_part(start):
+            end = min(start + part_size, size) - 1
+            write_at(fd, self._read_range(source_key, start, end), start)
+
+        fd = os.open(destination_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+        try:
+            os.ftruncate(fd, size)
+            executor = ThreadPoolExecutor(max_workers=max_concurrency)
+            try:
+                for _ in executor.map(download_part,
+                                      range(0, size, part_size)):
+                    pass
+            finally:
+                executor.shutdown(wait=True)
+        except Exception:
+            os.close(fd)
+            os.remove(destination_file)
+            raise
+        os.close(fd)
+
+        seconds = time.time() - started
+        throughput = size / seconds if seconds else float(size)
+        logger.debug("Downloaded {0} bytes in {1:.2f}s at {2:.0f} bytes/s"
+                     .format(size, seconds, throughput))
+        return {'size': size, 'seconds': seconds, 'throughput': throughput}
+
+    def open(self, key, mode='rb', **kwargs):
+        """Open an object as a file object. Objects opened with mode 'rb' are
+        read via a seekable file object serving reads with ranged requests.
+        Objects opened with mode 'wb' are written via a file object uploading
+        parts of the object while it is written, and committing it on close.
+
+        :param str key: Key for object to be opened
+        :param str mode: Mode to open the object in, either 'rb' or 'wb'
+        :param \**kwargs: Passed on to :py:class:`spongeblob.storage.blobio.BlobReader`
+                          or :py:class:`spongeblob.storage.blobio.BlobWriter`
+        :returns: A file object for the object
+        :rtype: Union[BlobReader, BlobWriter]
+        :Example:
+            ::
+
+                with storage.open('/path/to/key', 'rb') as f:
+                    f.seek(-8, io.SEEK_END)
+                    footer = f.read()
+
+                with storage.open('/path/to/key', 'wb',
+                                  metadata={'key1': 'metadata1'}) as f:
+                    for line in lines:
+                        f.write(line)
+
+        """
+        if mode == 'rb':
+            return BlobReader(self, key, **kwargs)
+        elif mode == 'wb':
+            return BlobWriter(self, key, **kwargs)
+        raise ValueError('Unsupported mode "{0}"'.format(mode))
+
+    def _object_size(self, key):
+        """Fetch size of an object in bytes. Implemented by storage providers,
+        raising the provider error if the object does not exist
+
+        :param str key: Key of the object
+        :returns: Size of the object in bytes
+        :rtype: int
+
+        """
+        raise NotImplementedError
+
+    def _read_range(self, key, start, end):
+        """Fetch a byte range of an object. Implemented by storage providers
+
+        :param str key: Key of the object
+        :param int start: Offset of the first byte of the range
+        :param int end: Offset of the last byte of the range, inclusive
+        :returns: Content of the range
+        :rtype: bytes
+
+        """
+        raise NotImplementedError
+
+    def _read_first_range(self, key, end):
+        """Fetch bytes of an object from its start upto an offset, along with
+        size and metadata of the object, with a single request. Implemented
+        by storage providers, raising the provider error if the object does
+        not exist
+
+        :param str key: Key of the object
+        :param int end: Offset of the last byte of the range, inclusive
+        :returns: Content of the range, size of the object and its metadata
+        :rtype: tuple(bytes, int, dict)
+
+        """
+        raise NotImplementedError
+
+    def upload_file(self, destination_key, source_file, metadata=None,
+                    skip_if_identical=False, checksum=None, codec=None):
         """Upload a file from local filesystem
 
         :param str destination_key: Key where to store object
         :param str source_file: Path on local file system for file to be uploaded
         :param dict metadata: Metadata to be stored along with object
+        :param bool skip_if_identical: If set to True, the upload is skipped if the
+                                       object has the same checksum as the file,
+                                       leaving metadata of the object as is.
+                                       Uploaded objects record the md5 of the
+                                       file in their metadata
+        :param str checksum: If set to md5 or crc32c, the checksum is computed on
+                             the data read for the upload and stored in
+                             object metadata once the upload completes
+        :param str codec: If set to gzip or zstd, the data is compressed while
+                          uploading, and the codec stored in object metadata
+        :returns: True if the file was uploaded, False if the upload was skipped
+        :rtype: bool
+
+        """
+        raise NotImplementedError
+
+    def _stored_checksums(self, key):
+        """Fetch checksums stored along with an object by the provider. This
+        is implemented by storage providers and used by `_check_identical`
+
+        :param str key: Key for object
+        :returns: A dict with size, md5, multipart_etag and metadata keys, with
+                  None for checksums not available, or None if the object is
+                  not found
+        :rtype: dict
+
+        """
+        raise NotImplementedError
+
+    def _check_identical(self, key, source_file, metadata=None, codec=None):
+        """Compare a file with the object at a key, for uploads with
+        `skip_if_identical`. The md5 of the file is compared with the md5
+        stored by the provider if available, else the multipart upload ETag
+        of the file for the part size of the transfer profile is compared
+        with the ETag of the object, else the md5 is compared with the md5
+        stored in object metadata by spongeblob. Objects stored with another
+        codec than the upload are never identical.
+
+        :param str key: Key for object
+        :param str source_file: Path on local file system for file to be uploaded
+        :param dict metadata: Metadata to be stored along with object
+        :param str codec: Codec the file is to be uploaded with
+        :returns: True if the object is identical to the file, and metadata to
+                  upload the file with otherwise, which records its md5
+        :rtype: tuple(bool, dict)
+
+        """
+        stored = self._stored_checksums(key)
+        md5, multipart_etag = file_checksums(source_file,
+                                             self.transfer_profile.part_size)
+        metadata = dict(metadata or {}, **{MD5_METADATA_KEY: md5})
+        if stored is None:
+            return False, metadata
+        stored_codec = get_metadata(stored['metadata'], CODEC_METADATA_KEY)
+        if stored_codec != codec:
+            return False, metadata
+        if stored_codec:
+            # Size and checksums of encoded objects are those of the
+            # compressed data
+            return (get_metadata(stored['metadata'], MD5_METADATA_KEY) == md5,
+                    metadata)
+        if stored['size'] != os.path.getsize(source_file):
+            return False, metadata
+        if stored['md5'] is not None:
+            return stored['md5'] == md5, metadata
+        if stored['multipart_etag'] == multipart_etag:
+            return True, metadata
+        return (get_metadata(stored['metadata'], MD5_METADATA_KEY) == md5,
+                metadata)
+
+    def _encoding_reader(self, source_fd, metadata, checksum=None,
+                         codec=None):
+        """Wrap a file object to be uploaded with readers computing its
+        checksum and compressing it with a codec, for `_upload_encoded`
+
+        :param file source_fd: A file object to be uploaded
+        :param dict metadata: Metadata to be stored along with object
+        :param str checksum: Name of the checksum, md5 or crc32c
+        :param str codec: Name of the codec, gzip or zstd
+        :returns: The reader to upload, the reader computing the checksum or
+                  None, and metadata recording the codec
+        :rtype: tuple(file, HashingReader, dict)
+
+        """
+        reader = source_fd
+        hashing_reader = None
+        if checksum:
+            reader = hashing_reader = HashingReader(reader, checksum)
+        if codec:
+            reader = CompressingReader(reader, codec)
+            metadata = dict(metadata or {}, **{CODEC_METADATA_KEY: codec})
+        return reader, hashing_reader, metadata
+
+    def _upload_encoded(self, destination_key, source_fd, metadata,
+                        checksum=None, codec=None):
+        """Upload a file object while computing its checksum on the data
+        read for the upload, and compressing it with a codec. The codec is
+        stored in object metadata along with the upload, and the checksum of
+        the data before compression once the upload completes.
+
+        :param str destination_key: Key where to store object
+        :param file source_fd: A file object to be uploaded
+        :param dict metadata: Metadata to be stored along with object
+        :param str checksum: Name of the checksum, md5 or crc32c
+        :param str codec: Name of the codec, gzip or zstd
+        :returns: Nothing
+        :rtype: None
+
+        """
+        reader, hashing_reader, metadata = self._encoding_reader(
+            source_fd, metadata, checksum, codec)
+        self.upload_file_obj(destination_key, reader, metadata=metadata)
+        if checksum:
+            metadata = dict(metadata or {}, **{
+                checksum_metadata_key(checksum): hashing_reader.hexdigest()})
+            self._update_metadata(destination_key, metadata)
+
+    def _update_metadata(self, key, metadata):
+        """Replace metadata of an object. This is implemented by storage
+        providers and used by uploads with checksums
+
+        :param str key: Key for object
+        :param dict metadata: Metadata to be stored along with object
         :returns: Nothing
         :rtype: None
 
         """
         raise NotImplementedError
 
-    def upload_file_obj(self, destination_key, source_fd, metadata=None):
+    def _download_decoded(self, source_key, destination_file,
+                          verify_checksum=False, decode=True):
+        """Download an object to local filesystem while decompressing it
+        with the codec stored along with the object, and computing the
+        checksum stored along with the object on the decompressed data, to
+        verify it once the download completes. The codec and checksum are
+        read from metadata returned with the first part of the object, and
+        the other parts are fetched with concurrent ranged requests and
+        written in order. Objects with a codec downloaded without decoding
+        are verified by decompressing the downloaded file once more, and
+        objects without a stored checksum are downloaded without
+        verification. The destination file is removed if the download fails.
+
+        :param str source_key: Key for object to be downloaded
+        :param str destination_file: Path on local filesystem to download file
+        :param bool verify_checksum: If set to True, the checksum is verified
+        :param bool decode: If set to True, the object is decompressed
+        :returns: Nothing
+        :rtype: None
+        :raises ChecksumMismatchError: If the checksum does not match
+
+        """
+        part_size = self.transfer_profile.part_size
+        max_concurrency = self.transfer_profile.max_concurrency
+        data, size, metadata = self._read_first_range(source_key,
+                                                      part_size - 1)
+        checksum = stored_checksum(metadata) if verify_checksum else None
+        stored_codec = get_metadata(metadata, CODEC_METADATA_KEY)
+        codec = stored_codec if decode else None
+        # Checksums are of decompressed data, so data downloaded compressed
+        # is hashed from the downloaded file
+        hash_inline = checksum and (codec or not stored_codec)
+        if verify_checksum and not checksum:
+            logger.debug("No checksum stored for {0}".format(source_key))
+
+        def read_part(start):
+            return self._read_range(source_key, start,
+                                    min(start + part_size, size) - 1)
+
+        try:
+            with open(destination_file, 'wb') as f:
+                writer = f
+                if hash_inline:
+                    writer = hashing_writer = HashingWriter(f, checksum[0])
+                if codec:
+                    writer = DecodingWriter(writer, codec)
+                writer.write(data)
+                for data in map_ordered(read_part,
+                                        range(len(data), size, part_size),
+                                        workers=max_concurrency,
+                                        window=max_concurrency):
+                    writer.write(data)
+                if codec:
+                    writer.finish()
+            if checksum:
+                digest = hashing_writer.hexdigest() if hash_inline else None
+                if digest is None:
+                    # Data was downloaded compressed
+                    digest = file_checksum(destination_file, checksum[0],
+                                           codec=None if codec else
+                                           stored_codec)
+                if digest != checksum[1]:
+                    raise ChecksumMismatchError(source_key, checksum[0],
+                                                checksum[1], digest)
+        except Exception:
+            if os.path.exists(destination_file):
+                os.remove(destination_file)
+            raise
+
+    def upload_file_obj(self, destination_key, source_fd, metadata=None,
+                        checksum=None, codec=None):
         """Upload a file from file object
 
         :param str destination_key: Key where to store object
         :param file source_fd: A file object to be uploaded
         :param dict metadata: Metadata to be stored along with object
+        :param str checksum: If set to md5 or crc32c, the checksum is computed on
+                             the data read for the upload and stored in
+                             object metadata once the upload completes
+        :param str codec: If set to gzip or zstd, the data is compressed while
+                          uploading, and the codec stored in object metadata
+        :returns: Nothing
+        :rtype: None
+
+        """
+        raise NotImplementedError
+
+    def upload_bytes(self, destination_key, source_bytes, metadata=None):
+        """Upload an object from memory
+
+        :param str destination_key: Key where to store object
+        :param bytes source_bytes: A bytes like object, such as bytes, bytearray or memoryview
+        :param dict metadata: Metadata to be stored along with object
         :returns: Nothing
         :rtype: None
 
+        """
+        self.upload_file_obj(destination_key, io.BytesIO(source_bytes),
+                             metadata=metadata)
+
+    def _create_multipart(self, key, metadata=None):
+        """Start an upload of an object in parts. Implemented by storage
+        providers, along with `_upload_part`, `_complete_multipart` and
+        `_abort_multipart`
+
+        :param str key: Key where to store object
+        :param dict metadata: Metadata to be stored along with object
+        :returns: Provider specific state of the upload
+        """
+        raise NotImplementedError
+
+    def _upload_part(self, key, upload, part_number, data):
+        """Upload a part of an object. Parts can be uploaded concurrently
+
+        :param str key: Key where to store object
+        :param upload: State of the upload returned by `_create_multipart`
+        :param int part_number: Number of the part, starting at 1
+        :param bytes data: Content of the part
+        :returns: Provider specific description of the uploaded part
+        """
+        raise NotImplementedError
+
+    def _complete_multipart(self, key, upload, parts, metadata=None):
+        """Commit an object from its uploaded parts
+
+        :param str key: Key where to store object
+        :param upload: State of the upload returned by `_create_multipart`
+        :param list parts: Parts returned by `_upload_part`, ordered by part number
+        :param dict metadata: Metadata to be stored along with object
+        """
+        raise NotImplementedError
+
+    def _abort_multipart(self, key, upload):
+        """Discard uploaded parts of an object
+
+        :param str key: Key where object was to be stored
+        :param upload: State of the upload returned by `_create_multipart`
         """
         raise NotImplementedError
 
@@ -134,6 +862,61 @@ class Storage(object):
         """
         raise NotImplementedError
 
+    def start_copy(self, source_key, destination_key, metadata=None):
+        """Start copying an object from one key to another key on server side.
+        Storage providers copying objects asynchronously return a pending copy,
+        which is completed by `wait_copies`. Others copy the object before
+        returning.
+
+        :param str source_key: Source key for the object to be copied
+        :param str destination_key: Destination key to store object
+        :param dict metadata: Metadata to be stored along with object
+        :returns: A handle tracking the copy
+        :rtype: CopyHandle
+
+        """
+        self.copy_from_key(source_key, destination_key, metadata=metadata)
+        return CopyHandle(source_key, destination_key)
+
+    def wait_copies(self, handles, timeout=None):
+        """Wait for copies started by `start_copy` to complete, updating the
+        status of their handles. Failed copies are not raised, call
+        `CopyHandle.raise_for_status` to raise them.
+
+        :param list[CopyHandle] handles: Handles of copies to wait for
+        :param float timeout: Maximum seconds to wait for. Copies still pending
+                              after it are left pending. Waits until all copies
+                              are done if None
+        :returns: The handles
+        :rtype: list[CopyHandle]
+
+        """
+        return handles
+
+    def copy_keys(self, keys, metadata=None):
+        """Copy objects on server side, starting copies with `start_copy` on
+        `COPY_WORKERS` threads as keys are consumed, waiting for each batch of
+        `COPY_BATCH_SIZE` copies with `wait_copies`, and streaming back the
+        result of each copy. Errors starting a copy are reported in its result.
+
+        :param keys: An iterable of tuples of source key and destination key
+        :param dict metadata: Metadata to be stored along with each object
+        :returns: A generator of dict describing result of each copy, in the
+                  order of keys. The returned dict will look like this
+                  ::
+
+                      {"source_key": "/key/for/source",
+                       "destination_key": "/key/for/destination",
+                       "copied": <True if object was copied, else False>,
+                       "error": Union(<error_message>, None)}
+
+        :rtype: Iterator[dict]
+
+        """
+        return copy_in_batches(self.start_copy, self.wait_copies, keys,
+                               metadata, self.COPY_WORKERS,
+                               self.COPY_BATCH_SIZE)
+
     def delete_key(self, destination_key):
         """Delete an object
 
@@ -143,3 +926,48 @@ class Storage(object):
 
         """
         raise NotImplementedError
+
+    def delete_batch(self, keys):
+        """Delete a batch of objects, upto `DELETE_BATCH_SIZE` keys. Storage
+        providers implement this with their batch or concurrent delete apis.
+        Keys which do not exist are reported as deleted.
+
+        :param list[str] keys: Keys of objects to be deleted
+        :returns: A list of dict describing result of each delete, in the order
+                  of keys. The returned dict will look like this
+                  ::
+
+                      {"key": "/key/for/object",
+                       "deleted": <True if object was deleted, else False>,
+                       "error": Union(<error_message>, None)}
+
+        :rtype: list[dict]
+
+        """
+        raise NotImplementedError
+
+    def delete_keys(self, keys):
+        """Delete objects in batches of `DELETE_BATCH_SIZE` keys via
+        `delete_batch`, streaming back the result of each delete
+
+        :param keys: An iterable of keys for objects to be deleted
+        :returns: A generator of dict describing result of each delete, as
+                  returned by `delete_batch`
+        :rtype: Iterator[dict]
+
+        """
+        for batch in chunked(keys, self.DELETE_BATCH_SIZE):
+            for result in self.delete_batch(batch):
+                yield result
+
+    def delete_prefix(self, prefix):
+        """Delete all objects matching a prefix via `delete_keys`
+
+        :param str prefix: String to match when searching files to be deleted
+        :returns: A generator of dict describing result of each delete, as
+                  returned by `delete_batch`
+        :rtype: Iterator[dict]
+
+        """
+        return self.delete_keys(obj['key']
+                                for obj in self.list_object_keys(prefix))
@@ -1,10 +1,23 @@
 import time
+import base64
+import binascii
 import logging
-
-from .storage import Storage
-from azure.common import AzureConflictHttpError, AzureException
+from concurrent.futures import ThreadPoolExecutor
+
+from .storage import Storage, Page
+from .profile import TransferProfile
+from .client_pool import DEFAULT_CLIENT_POOL, credentials_key
+from .checksum import ChecksumMismatchError, checksum_metadata_key
+from .copies import CopyFailedError, CopyHandle
+from ..utils import map_ordered
+from azure.common import (AzureConflictHttpError,
+                          AzureException,
+                          AzureHttpError,
+                          AzureMissingResourceHttpError)
 from azure.storage.blob import BlockBlobService
-from azure.storage.blob.models import Include
+from azure.storage.blob.models import BlobBlock, BlobPrefix, Include
+from requests import Session
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -15,23 +28,64 @@ class WABS(Storage):
     the interface of Storage base class
     """
 
-    def __init__(self, account_name, container_name, sas_token):
+    # WABS has no batch delete api, so batches are deleted concurrently
+    DELETE_BATCH_SIZE = 256
+    DELETE_WORKERS = 16
+    # A block blob holds upto 50000 committed blocks
+    MAX_PARTS = 50000
+    # Polling of pending copies, see `wait_copies`
+    COPY_POLL_INTERVAL = 0.5
+    COPY_MAX_POLL_INTERVAL = 30
+    COPY_LIST_THRESHOLD = 100
+
+    def __init__(self, account_name, container_name, sas_token,
+                 transfer_profile=None, client_pool=None):
         """Setup a Windows azure blob storage client object
 
         :param str account_name: Azure blob storage account name for connection
         :param str container_name: Name of container to be accessed in the account
         :param str sas_token: Shared access signature token for access
+        :param transfer_profile: A TransferProfile or the name of a preset, mapped onto
+                                 azure sdk max_connections, block sizes and socket_timeout
+        :type transfer_profile: Union[TransferProfile, str]
+        :param ClientPool client_pool: Registry of clients to share the blob service client from.
+                                       Defaults to a registry shared by all storages
 
         """
         self.sas_token = sas_token
         self.container_name = container_name
+        self.transfer_profile = TransferProfile.get(transfer_profile)
+
+        if client_pool is None:
+            client_pool = DEFAULT_CLIENT_POOL
+        profile = self.transfer_profile
+        client_key = ('wabs', credentials_key(account_name, sas_token),
+                      profile.part_size, profile.multipart_threshold,
+                      profile.connect_timeout, profile.read_timeout,
+                      profile.max_pool_connections)
+        self.client = client_pool.get(
+            client_key, lambda: self._create_client(account_name, sas_token))
+        logger.debug("Created wabs client object: {0}".format(self.client))
 
+    def _create_client(self, account_name, sas_token):
+        """Create a blob service client configured by the transfer profile"""
+        profile = self.transfer_profile
+        session = Session()
+        adapter = HTTPAdapter(pool_maxsize=profile.max_pool_connections)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
         # The socket_timeout is passed on to the requests session
-        # which executes the HTTP call. Both read / connect timeouts
-        # are set to 60s
-        self.client = BlockBlobService(account_name=account_name,
-                                       sas_token=self.sas_token)
-        logger.debug("Created wabs client object: {0}".format(self.client))
+        # which executes the HTTP call, as a (connect, read) timeout tuple
+        client = BlockBlobService(
+            account_name=account_name,
+            sas_token=sas_token,
+            request_session=session,
+            socket_timeout=(profile.connect_timeout, profile.read_timeout))
+        client.MAX_BLOCK_SIZE = profile.part_size
+        client.MAX_CHUNK_GET_SIZE = profile.part_size
+        client.MAX_SINGLE_GET_SIZE = profile.multipart_threshold
+        client.MAX_SINGLE_PUT_SIZE = profile.multipart_threshold
+        return client
 
     @classmethod
     def get_retriable_exceptions(cls, method_name=None):
@@ -44,6 +98,10 @@ class WABS(Storage):
         """
         if method_name == 'delete_key':
             return ()
+        elif method_name == 'copy_from_key':
+            return (AzureException, CopyFailedError)
+        elif method_name.startswith('download_'):
+            return (AzureException, ChecksumMismatchError)
         return (AzureException,)
 
     def get_url_prefix(self):
@@ -57,20 +115,22 @@ class WABS(Storage):
                                     self.client.primary_endpoint,
                                     self.container_name)
 
-    def list_object_keys(self, prefix='', metadata=False, pagesize=1000):
-        """List object keys matching a prefix for the WABS client
+    def _list_pages(self, prefix, metadata=False, pagesize=1000,
+                    delimiter=None, marker=None):
+        """List pages of objects matching a prefix for the WABS client
 
         :param str prefix: A prefix string to list objects
         :param bool metadata: If set to True, object metadata will be fetched with object. Default is False
         :param int pagesize: Maximum objects to be fetched in a single WABS api call. This is limited to upto 5000 objects in WABS
-        :returns: A generator of object dictionary with key, size and last_modified keys. Metadata will be returned if set to True
-        :rtype: Iterator[dict]
+        :param str delimiter: If set, blobs are rolled up into blob prefixes at the delimiter
+        :param str marker: Continuation marker of a page to start listing from
+        :returns: A generator of pages of object dictionary with key, size and last_modified keys. Metadata will be returned if set to True
+        :rtype: Iterator[Page]
 
         """
 
         logger.debug("Listing files for prefix: {0}".format(prefix))
         include = Include(metadata=metadata)
-        marker = None
         while True:
             if marker:
                 logger.debug("Paging objects "
@@ -79,87 +139,312 @@ class WABS(Storage):
                                              prefix=prefix,
                                              num_results=pagesize,
                                              include=include,
+                                             delimiter=delimiter,
                                              marker=marker)
+            blobs, prefixes = [], []
             for obj in objects:
-                yield {'key': obj.name,
-                       'last_modified': obj.properties.last_modified,
-                       'size': obj.properties.content_length,
-                       'metadata': obj.metadata}
+                if isinstance(obj, BlobPrefix):
+                    prefixes.append(obj.name)
+                else:
+                    blobs.append({'key': obj.name,
+                                  'last_modified': obj.properties.last_modified,
+                                  'size': obj.properties.content_length,
+                                  'metadata': obj.metadata})
+            yield Page(marker, blobs, prefixes)
 
             if objects.next_marker:
                 marker = objects.next_marker
             else:
                 break
 
-    def download_file(self, source_key, destination_file):
+    def get_object_properties(self, key, metadata=False):
+        """Fetch object properties and optionally metadata from WABS blob
+        properties. If the object is not found return None.
+
+        :param str key: Key for object for which you want to fetch metdata and properties
+        :param bool metadata: If set to True, metadata will be returned, else not.
+        :returns: A dictionary object with key, size, last_modified and metadata keys
+        :rtype: dict
+
+        """
+        if not key:
+            return None
+        try:
+            blob = self.client.get_blob_properties(self.container_name, key)
+        except AzureMissingResourceHttpError:
+            return None
+        return {'key': key,
+                'last_modified': blob.properties.last_modified,
+                'size': blob.properties.content_length,
+                'metadata': blob.metadata if metadata else None}
+
+    def download_file(self, source_key, destination_file,
+                      verify_checksum=False, decode=True):
         """Download a object from WABS container to local filesystem
 
         :param str source_key: Key for object to be downloaded
         :param str destination_file: Path on local filesystem to download file
+        :param bool verify_checksum: If set to True, the checksum stored along with
+                                     the object on upload is computed on the
+                                     downloaded data and verified. Objects
+                                     without a checksum are not verified
+        :param bool decode: If set to True, objects uploaded with a codec are
+                            decompressed while downloading, looking up the
+                            codec in metadata returned with the first part of
+                            the object. Parts are then fetched with concurrent
+                            ranged requests. If set to False, objects are
+                            downloaded as stored, and with `verify_checksum`
+                            the downloaded file of an object with a codec is
+                            decompressed once more to verify the checksum
         :returns: Nothing
         :rtype: None
 
         """
-        self.client.get_blob_to_path(self.container_name, source_key,
-                                     destination_file)
+        if verify_checksum or decode:
+            return self._download_decoded(source_key, destination_file,
+                                          verify_checksum, decode)
+        self.client.get_blob_to_path(
+            self.container_name, source_key, destination_file,
+            max_connections=self.transfer_profile.max_concurrency)
+
+    def download_file_obj(self, source_key, destination_fd):
+        """Download a object from WABS container to a file object. The blob is
+        downloaded in parallel chunks only if the file object is seekable.
+
+        :param str source_key: Key for object to be downloaded
+        :param file destination_fd: A writable file object to download object into
+        :returns: Nothing
+        :rtype: None
+
+        """
+        seekable = getattr(destination_fd, 'seekable', None)
+        max_connections = (self.transfer_profile.max_concurrency
+                           if seekable and seekable() else 1)
+        self.client.get_blob_to_stream(self.container_name, source_key,
+                                       destination_fd,
+                                       max_connections=max_connections)
+
+    def download_bytes(self, source_key):
+        """Download a object from WABS container in memory
 
-    def upload_file(self, destination_key, source_file, metadata=None):
+        :param str source_key: Key for object to be downloaded
+        :returns: Content of the object
+        :rtype: bytes
+
+        """
+        return self.client.get_blob_to_bytes(
+            self.container_name, source_key,
+            max_connections=self.transfer_profile.max_concurrency).content
+
+    def _object_size(self, key):
+        """Fetch size of an object in bytes from its blob properties"""
+        return self.client.get_blob_properties(
+            self.container_name, key).properties.content_length
+
+    def _read_range(self, key, start, end):
+        """Fetch an inclusive byte range of an object"""
+        return self.client.get_blob_to_bytes(self.container_name, key,
+                                             start_range=start,
+                                             end_range=end,
+                                             max_connections=1).content
+
+    def _read_first_range(self, key, end):
+        """Fetch bytes of a blob from its start upto an offset, along with
+        size and metadata of the blob, with a single GET request"""
+        try:
+            blob = self.client.get_blob_to_bytes(self.container_name, key,
+                                                 start_range=0,
+                                                 end_range=end,
+                                                 max_connections=1)
+        except AzureHttpError as e:
+            if e.status_code != 416:
+                raise
+            # Ranges of empty blobs are not satisfiable
+            blob = self.client.get_blob_to_bytes(self.container_name, key,
+                                                 max_connections=1)
+        content_range = blob.properties.content_range
+        size = (int(content_range.rsplit('/', 1)[1]) if content_range
+                else blob.properties.content_length)
+        return blob.content, size, blob.metadata
+
+    def upload_file(self, destination_key, source_file, metadata=None,
+                    skip_if_identical=False, checksum=None, codec=None):
         """Upload a file from local filesystem to WABS
 
         :param str destination_key: Key where to store object
         :param str source_file: Path on local file system for file to be uploaded
         :param dict metadata: Metadata to be stored along with object
-        :returns: Nothing
-        :rtype: None
+        :param bool skip_if_identical: If set to True, the upload is skipped if the
+                                       Content-MD5 of the blob matches the file
+        :param str checksum: If set to md5 or crc32c, the checksum is computed on
+                             the data read for the upload, which is then
+                             uploaded in blocks, and stored in blob metadata
+                             when committing the block list
+        :param str codec: If set to gzip or zstd, the data is compressed while
+                          uploading, and the codec stored in object metadata
+        :returns: True if the file was uploaded, False if the upload was skipped
+        :rtype: bool
 
         """
+        if skip_if_identical:
+            identical, metadata = self._check_identical(destination_key,
+                                                        source_file, metadata,
+                                                        codec)
+            if identical:
+                logger.debug("Skipping upload of file {0} identical to {1}"
+                             .format(source_file, destination_key))
+                return False
+        if checksum or codec:
+            with open(source_file, 'rb') as f:
+                self._upload_encoded(destination_key, f, metadata,
+                                     checksum, codec)
+            return True
         metadata = metadata or {}
         logger.debug("Uploading file {0} to prefix {1}"
                      .format(source_file, destination_key))
-        self.client.create_blob_from_path(self.container_name, destination_key,
-                                          source_file, metadata=metadata)
+        self.client.create_blob_from_path(
+            self.container_name, destination_key, source_file,
+            metadata=metadata,
+            max_connections=self.transfer_profile.max_concurrency)
+        return True
+
+    def _stored_checksums(self, key):
+        """Fetch the Content-MD5 of a blob from its properties. It is set by
+        WABS for blobs uploaded with a single request, but not for blobs
+        uploaded in blocks
+
+        :param str key: Key for object
+        :returns: A dict with size, md5, multipart_etag and metadata keys
+        :rtype: dict
 
-    def upload_file_obj(self,  destination_key, source_fd, metadata=None):
+        """
+        try:
+            blob = self.client.get_blob_properties(self.container_name, key)
+        except AzureMissingResourceHttpError:
+            return None
+        content_md5 = blob.properties.content_settings.content_md5
+        return {'size': blob.properties.content_length,
+                'md5': (binascii.hexlify(base64.b64decode(content_md5))
+                        .decode('ascii') if content_md5 else None),
+                'multipart_etag': None,
+                'metadata': blob.metadata}
+
+    def upload_file_obj(self,  destination_key, source_fd, metadata=None,
+                        checksum=None, codec=None):
         """Upload a file from file object to WABS
 
         :param str destination_key: Key where to store object
         :param file source_fd: A file object to be uploaded
         :param dict metadata: Metadata to be stored along with object
+        :param str checksum: If set to md5 or crc32c, the checksum is computed on
+                             the data read for the upload, which is then
+                             uploaded in blocks, and stored in blob metadata
+                             when committing the block list
+        :param str codec: If set to gzip or zstd, the data is compressed while
+                          uploading, and the codec stored in object metadata
         :returns: Nothing
         :rtype: None
 
         """
+        if checksum or codec:
+            return self._upload_encoded(destination_key, source_fd,
+                                        metadata, checksum, codec)
         metadata = metadata or {}
-        self.client.create_blob_from_stream(self.container_name,
-                                            destination_key,
-                                            source_fd,
-                                            metadata=metadata)
+        self.client.create_blob_from_stream(
+            self.container_name, destination_key, source_fd,
+            metadata=metadata,
+            max_connections=self.transfer_profile.max_concurrency)
+
+    def upload_bytes(self, destination_key, source_bytes, metadata=None):
+        """Upload an object from memory to WABS
+
+        :param str destination_key: Key where to store object
+        :param bytes source_bytes: A bytes like object, such as bytes, bytearray or memoryview
+        :param dict metadata: Metadata to be stored along with object
+        :returns: Nothing
+        :rtype: None
+
+        """
+        metadata = metadata or {}
+        logger.debug("Uploading {0} bytes to prefix {1}"
+                     .format(len(source_bytes), destination_key))
+        # The azure sdk accepts only bytes, so other buffers are copied
+        if not isinstance(source_bytes, bytes):
+            source_bytes = bytes(source_bytes)
+        self.client.create_blob_from_bytes(
+            self.container_name, destination_key, source_bytes,
+            metadata=metadata,
+            max_connections=self.transfer_profile.max_concurrency)
+
+    def _create_multipart(self, key, metadata=None):
+        """Blocks need no setup on WABS, so there is no upload state"""
+        return None
+
+    def _upload_part(self, key, upload, part_number, data):
+        """Upload a part as an uncommitted block of the blob"""
+        # Block ids of a blob must all be of the same length
+        block_id = '{0:08d}'.format(part_number)
+        self.client.put_block(self.container_name, key, data, block_id)
+        return BlobBlock(id=block_id)
+
+    def _complete_multipart(self, key, upload, parts, metadata=None):
+        """Commit the uploaded blocks as the blob content"""
+        self.client.put_block_list(self.container_name, key, parts,
+                                   metadata=metadata or {})
+
+    def _abort_multipart(self, key, upload):
+        """Uncommitted blocks are garbage collected by WABS after a week, and
+        can't be deleted explicitly, so there is nothing to do here"""
 
-    # FIXME: Need to fix this function to abort, if another copy is already
-    # happening it should abort, or it should follow the ec2 behaviour
     def copy_from_key(self, source_key, destination_key, metadata=None):
-        """Copy a WABS object from one key to another key on server side
+        """Copy a WABS object from one key to another key on server side,
+        waiting for the copy to complete
 
         :param str source_key: Source key for the object to be copied
         :param str destination_key: Destination key to store object
         :param dict metadata: Metadata to be stored along with object
         :returns: Nothing
         :rtype: None
+        :raises CopyFailedError: If the copy fails or is aborted
+
+        """
+        handle = self.start_copy(source_key, destination_key,
+                                 metadata=metadata)
+        self.wait_copies([handle])
+        handle.raise_for_status()
+
+    def start_copy(self, source_key, destination_key, metadata=None):
+        """Start copying a WABS object from one key to another key on server
+        side. Copies within a storage account usually complete before
+        returning, others are pending until completed by `wait_copies`. A
+        pending copy to the destination key is aborted, as WABS allows a single
+        pending copy per blob.
+
+        :param str source_key: Source key for the object to be copied
+        :param str destination_key: Destination key to store object
+        :param dict metadata: Metadata to be stored along with object
+        :returns: A handle tracking the copy
+        :rtype: CopyHandle
 
         """
         metadata = metadata or {}
         logger.debug("Copying key {0} -> {1}"
                      .format(source_key, destination_key))
-
-        # If a previous copy was pending cancel it before
-        # starting another copy
-        for blob in self.client.list_blobs(self.container_name,
-                                           prefix=destination_key):
-            # There should only be one blob with the given key,
-            # However list_blobs is the only exposed API to check
-            # existance of blob without failures
-            # AzureBlobStorage doesn't allow more than one pending
-            # copies to the destination key
+        source_uri = self.client.make_blob_url(self.container_name,
+                                               source_key,
+                                               sas_token=self.sas_token)
+        try:
+            copy = self.client.copy_blob(self.container_name,
+                                         destination_key,
+                                         source_uri,
+                                         metadata=metadata)
+        except AzureConflictHttpError:
+            blob = self.client.get_blob_properties(self.container_name,
+                                                   destination_key)
+            if blob.properties.copy.status != 'pending':
+                raise
+            logger.info("Aborting pending copy {0} to {1}"
+                        .format(blob.properties.copy.id, destination_key))
             try:
                 self.client.abort_copy_blob(self.container_name,
                                             destination_key,
@@ -167,21 +452,131 @@ class WABS(Storage):
             except AzureConflictHttpError:
                 logger.info(('No copy in progress,' +
                              ' Ignoring AzureConflictHttpError'))
-        source_uri = self.client.make_blob_url(self.container_name,
-                                               source_key,
-                                               sas_token=self.sas_token)
-        copy_properties = self.client.copy_blob(self.container_name,
-                                                destination_key,
-                                                source_uri,
-                                                metadata=metadata)
-        # Wait for the copy to be a success
-        while copy_properties.status == 'pending':
-            # Wait a second before retrying
-            time.sleep(1)
-            properties = self.client.get_blob_properties(self.container_name,
-                                                         destination_key)
-            copy_properties = properties.properties.copy
-            # TODO(vin): Raise Error if copy_properties errors out
+            copy = self.client.copy_blob(self.container_name,
+                                         destination_key,
+                                         source_uri,
+                                         metadata=metadata)
+        return CopyHandle(source_key, destination_key, copy_id=copy.id,
+                          status=copy.status)
+
+    def wait_copies(self, handles, timeout=None):
+        """Wait for copies started by `start_copy` to complete, polling the
+        status of pending copies until all are done. The polling interval
+        starts at `COPY_POLL_INTERVAL` seconds, and doubles upto
+        `COPY_MAX_POLL_INTERVAL` seconds while no copy completes. Status of
+        pending copies is polled by listing the directory of their destination
+        keys for directories with `COPY_LIST_THRESHOLD` or more of them, else
+        by fetching properties of each destination blob concurrently.
+
+        :param list[CopyHandle] handles: Handles of copies to wait for
+        :param float timeout: Maximum seconds to wait for. Copies still pending
+                              after it are left pending. Waits until all copies
+                              are done if None
+        :returns: The handles
+        :rtype: list[CopyHandle]
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        interval = self.COPY_POLL_INTERVAL
+        pending = [handle for handle in handles if not handle.done]
+        while pending:
+            if deadline is not None:
+                if time.time() >= deadline:
+                    break
+                interval = min(interval, max(deadline - time.time(), 0))
+            time.sleep(interval)
+            directories = {}
+            for handle in pending:
+                key = handle.destination_key
+                directories.setdefault(key[:key.rfind('/') + 1],
+                                       []).append(handle)
+            polled = []
+            for directory, directory_handles in directories.items():
+                if len(directory_handles) >= self.COPY_LIST_THRESHOLD:
+                    self._poll_copies_listing(directory, directory_handles)
+                else:
+                    polled.extend(directory_handles)
+            self._poll_copies(polled)
+            still_pending = [handle for handle in pending if not handle.done]
+            if len(still_pending) == len(pending):
+                interval = min(interval * 2, self.COPY_MAX_POLL_INTERVAL)
+            logger.debug("{0} of {1} copies pending"
+                         .format(len(still_pending), len(handles)))
+            pending = still_pending
+        return handles
+
+    @staticmethod
+    def _update_copy(handle, copy):
+        """Update a handle from copy properties of its destination blob, or
+        None if the blob is missing. A copy replaced by another copy or write
+        to the blob, or whose blob was deleted, is reported as aborted."""
+        if copy is None:
+            handle.status = 'aborted'
+            handle.description = 'Destination blob was deleted'
+        elif copy.id != handle.copy_id:
+            handle.status = 'aborted'
+            handle.description = 'Destination blob was replaced'
+        else:
+            handle.status = copy.status
+            handle.description = copy.status_description
+
+    def _poll_copies(self, handles):
+        """Update status of copies from properties of each destination blob"""
+        def poll(handle):
+            try:
+                blob = self.client.get_blob_properties(self.container_name,
+                                                       handle.destination_key)
+            except AzureMissingResourceHttpError:
+                self._update_copy(handle, None)
+            else:
+                self._update_copy(handle, blob.properties.copy)
+
+        for _ in map_ordered(poll, handles, workers=self.COPY_WORKERS):
+            pass
+
+    def _poll_copies_listing(self, directory, handles):
+        """Update status of copies to keys in a directory by listing the
+        blobs of the directory, without its subdirectories, with copy
+        properties"""
+        remaining = dict((handle.destination_key, handle)
+                         for handle in handles)
+        include = Include(copy=True)
+        marker = None
+        while remaining:
+            blobs = self.client.list_blobs(self.container_name,
+                                           prefix=directory,
+                                           num_results=5000,
+                                           include=include,
+                                           delimiter='/',
+                                           marker=marker)
+            for blob in blobs:
+                if isinstance(blob, BlobPrefix):
+                    continue
+                handle = remaining.pop(blob.name, None)
+                if handle is not None:
+                    self._update_copy(handle, blob.properties.copy)
+            marker = blobs.next_marker
+            if not marker:
+                break
+        for handle in remaining.values():
+            self._update_copy(handle, None)
+
+    def _upload_encoded(self, destination_key, source_fd, metadata,
+                        checksum=None, codec=None):
+        """Upload a file object in blocks while computing its checksum and
+        compressing it with a codec, like `Storage._upload_encoded`. The
+        checksum is stored in blob metadata when committing the block list,
+        so the blob never exists without it."""
+        reader, hashing_reader, metadata = self._encoding_reader(
+            source_fd, metadata, checksum, codec)
+        part_size = self.transfer_profile.part_size
+        with self.open(destination_key, 'wb', metadata=metadata) as writer:
+            for data in iter(lambda: reader.read(part_size), b''):
+                writer.write(data)
+            if checksum:
+                writer.metadata = dict(metadata or {}, **{
+                    checksum_metadata_key(checksum):
+                    hashing_reader.hexdigest()})
 
     def delete_key(self, destination_key):
         """Delete an object from WABS
@@ -193,3 +588,31 @@ class WABS(Storage):
         """
         logger.debug("Deleting key {0}".format(destination_key))
         return self.client.delete_blob(self.container_name, destination_key)
+
+    def delete_batch(self, keys):
+        """Delete a batch of objects from WABS with concurrent delete calls
+
+        :param list[str] keys: Keys of objects to be deleted
+        :returns: A list of dict with key, deleted and error keys for each key
+        :rtype: list[dict]
+
+        """
+        logger.debug("Deleting {0} keys".format(len(keys)))
+        executor = ThreadPoolExecutor(max_workers=self.DELETE_WORKERS)
+        try:
+            return list(executor.map(self._delete_result, keys))
+        finally:
+            executor.shutdown(wait=True)
+
+    def _delete_result(self, key):
+        """Delete a single object and describe the result as `delete_batch`
+        does. Http errors are reported in the result, and any other exception
+        is raised.
+        """
+        try:
+            self.client.delete_blob(self.container_name, key)
+        except AzureMissingResourceHttpError:
+            pass
+        except AzureHttpError as e:
+            return {'key': key, 'deleted': False, 'error': str(e)}
+        return {'key': key, 'deleted': True, 'error': None}
@@ -0,0 +1,260 @@
+"""Mirror directory trees on local filesystem to and from prefixes of a
+storage. A sync lists the prefix once, walks the directory once, and
+transfers only files which differ, concurrently with a
+:py:class:`spongeblob.transfer_manager.TransferManager`.
+
+By default files are compared by size and modification time. Objects store
+the time they were uploaded as `last_modified`, so `sync_up` uploads files
+modified after their object was uploaded, while `sync_down` sets the
+modification time of downloaded files to `last_modified` of their object and
+downloads objects whose time differs. With `checksum=True`, md5 checksums of
+files are compared with the `spongeblob_md5` metadata of objects, which
+`sync_up` stores when uploading with `checksum=True`. Objects without it are
+compared by size and modification time.
+"""
+import os
+import calendar
+import logging
+
+from spongeblob.storage.storage import MD5_METADATA_KEY
+from spongeblob.transfer_manager import TransferManager
+from spongeblob.utils import file_md5, get_metadata, map_ordered
+
+logger = logging.getLogger(__name__)
+
+
+def _key_prefix(prefix):
+    """Prefix for keys of files in a directory"""
+    if prefix and not prefix.endswith('/'):
+        return prefix + '/'
+    return prefix
+
+
+def _timestamp(last_modified):
+    """Seconds since epoch of the last_modified datetime of an object"""
+    return calendar.timegm(last_modified.utctimetuple())
+
+
+def _walk(local_dir):
+    """Map paths relative to a directory, with `/` separators, of files in
+    the directory tree to their `os.stat` results"""
+    files = {}
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, local_dir)
+            files[relative_path.replace(os.sep, '/')] = os.stat(path)
+    return files
+
+
+def _list(storage, prefix, metadata):
+    """Map keys relative to a prefix of objects matching the prefix to their
+    object dicts, skipping directory placeholder objects"""
+    objects = {}
+    for obj in storage.list_object_keys(prefix, metadata=metadata):
+        relative_key = obj['key'][len(prefix):]
+        if relative_key and not relative_key.endswith('/'):
+            objects[relative_key] = obj
+    return objects
+
+
+def _remote_md5(obj):
+    return get_metadata(obj.get('metadata'), MD5_METADATA_KEY)
+
+
+def _local_path(local_dir, relative_path):
+    return os.path.join(local_dir, *relative_path.split('/'))
+
+
+def _checksums(local_dir, relative_paths, max_workers):
+    """Map relative paths of files to their md5 checksums, computed
+    concurrently"""
+    relative_paths = list(relative_paths)
+    return dict(zip(relative_paths, map_ordered(
+        lambda relative_path: file_md5(_local_path(local_dir, relative_path)),
+        relative_paths, workers=max_workers)))
+
+
+def _summary():
+    return {'transferred': 0, 'bytes': 0, 'unchanged': 0, 'deleted': 0,
+            'failed': []}
+
+
+def _collect(summary, results):
+    for result in results:
+        if result['success']:
+            summary['transferred'] += 1
+            summary['bytes'] += result['size']
+        else:
+            summary['failed'].append(result)
+        yield result
+
+
+def sync_up(storage, local_dir, prefix, delete=False, checksum=False,
+            max_workers=8, progress_callback=None):
+    """Upload files of a local directory tree which are missing or differ
+    under a prefix of the storage
+
+    :param storage: Storage to upload files to
+    :type storage: Union[Storage, RetriableStorage]
+    :param str local_dir: Path of the directory on local filesystem
+    :param str prefix: Prefix under which files are stored, with paths of files
+                       relative to `local_dir` as the rest of their keys
+    :param bool delete: If set to True, objects under prefix without a local
+                        file are deleted
+    :param bool checksum: If set to True, files are compared by md5 checksums,
+                          which are stored as metadata of uploaded objects
+    :param int max_workers: Maximum number of files transferred concurrently
+    :param callable progress_callback: Passed on to `TransferManager`
+    :returns: A dict summarizing the sync. The returned dict will look like this
+              ::
+
+                  {"transferred": <files_uploaded>,
+                   "bytes": <bytes_uploaded>,
+                   "unchanged": <files_skipped>,
+                   "deleted": <objects_deleted>,
+                   "failed": <list_of_results_of_failed_uploads_and_deletes>}
+
+    :rtype: dict
+
+    :Example:
+        ::
+
+            from spongeblob import setup_storage
+            from spongeblob.sync import sync_up
+
+            s3 = setup_storage('s3',
+                               aws_key='access_key_id',
+                               aws_secret='access_key_secret',
+                               bucket_name='testbucket')
+            sync_up(s3, '/path/on/disk', 'path/to/prefix/', delete=True)
+
+    """
+    prefix = _key_prefix(prefix)
+    files = _walk(local_dir)
+    objects = _list(storage, prefix, metadata=checksum)
+    checksums = {}
+    if checksum:
+        checksums = _checksums(local_dir, files, max_workers)
+
+    summary = _summary()
+    uploads = []
+    for relative_path, stat in sorted(files.items()):
+        obj = objects.get(relative_path)
+        if obj is not None and obj['size'] == stat.st_size:
+            remote_md5 = _remote_md5(obj) if checksum else None
+            if remote_md5 is not None:
+                unchanged = remote_md5 == checksums[relative_path]
+            else:
+                unchanged = (int(stat.st_mtime) <=
+                             _timestamp(obj['last_modified']))
+            if unchanged:
+                summary['unchanged'] += 1
+                continue
+        path = _local_path(local_dir, relative_path)
+        if checksum:
+            uploads.append((prefix + relative_path, path,
+                            {MD5_METADATA_KEY: checksums[relative_path]}))
+        else:
+            uploads.append((prefix + relative_path, path))
+
+    logger.debug("Uploading {0} of {1} files to {2}"
+                 .format(len(uploads), len(files), prefix))
+    manager = TransferManager(storage, max_workers=max_workers,
+                              progress_callback=progress_callback)
+    for _ in _collect(summary, manager.upload_many(uploads)):
+        pass
+
+    if delete:
+        extraneous_keys = [prefix + relative_key for relative_key
+                           in sorted(set(objects) - set(files))]
+        for result in storage.delete_keys(extraneous_keys):
+            if result['deleted']:
+                summary['deleted'] += 1
+            else:
+                summary['failed'].append(result)
+    return summary
+
+
+def sync_down(storage, prefix, local_dir, delete=False, checksum=False,
+              max_workers=8, progress_callback=None):
+    """Download objects under a prefix of the storage which are missing or
+    differ in a local directory tree
+
+    :param storage: Storage to download objects from
+    :type storage: Union[Storage, RetriableStorage]
+    :param str prefix: Prefix of objects, with the rest of their keys as paths
+                       of files relative to `local_dir`
+    :param str local_dir: Path of the directory on local filesystem
+    :param bool delete: If set to True, files in local_dir without an object
+                        are deleted
+    :param bool checksum: If set to True, files are compared by md5 checksums
+                          with objects uploaded by `sync_up` with checksums
+    :param int max_workers: Maximum number of files transferred concurrently
+    :param callable progress_callback: Passed on to `TransferManager`
+    :returns: A dict summarizing the sync, as returned by `sync_up`
+    :rtype: dict
+
+    """
+    prefix = _key_prefix(prefix)
+    objects = _list(storage, prefix, metadata=checksum)
+    files = _walk(local_dir) if os.path.isdir(local_dir) else {}
+    checksums = {}
+    if checksum:
+        checksums = _checksums(
+            local_dir,
+            (relative_key for relative_key, obj in objects.items()
+             if relative_key in files and _remote_md5(obj) is not None and
+             files[relative_key].st_size == obj['size']),
+            max_workers)
+
+    summary = _summary()
+    downloads = []
+    timestamps = {}
+    for relative_key, obj in sorted(objects.items()):
+        parts = relative_key.split('/')
+        if any(part in ('', '.', '..') for part in parts):
+            logger.warning("Skipping {0}, which is not a valid relative path"
+                           .format(obj['key']))
+            continue
+        stat = files.get(relative_key)
+        if stat is not None and stat.st_size == obj['size']:
+            if relative_key in checksums:
+                unchanged = checksums[relative_key] == _remote_md5(obj)
+            else:
+                unchanged = (int(stat.st_mtime) ==
+                             _timestamp(obj['last_modified']))
+            if unchanged:
+                summary['unchanged'] += 1
+                continue
+        path = os.path.join(local_dir, *parts)
+        downloads.append((obj['key'], path, obj['size']))
+        timestamps[obj['key']] = _timestamp(obj['last_modified'])
+
+    def make_dirs(downloads):
+        for key, path, size in downloads:
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            yield key, path, size
+
+    logger.debug("Downloading {0} of {1} objects from {2}"
+                 .format(len(downloads), len(objects), prefix))
+    manager = TransferManager(storage, max_workers=max_workers,
+                              progress_callback=progress_callback)
+    for result in _collect(summary,
+                           manager.download_many(make_dirs(downloads))):
+        if result['success']:
+            timestamp = timestamps[result['key']]
+            os.utime(result['path'], (timestamp, timestamp))
+
+    if delete:
+        for relative_path in sorted(set(files) - set(objects)):
+            path = _local_path(local_dir, relative_path)
+            try:
+                os.remove(path)
+                summary['deleted'] += 1
+            except OSError as e:
+                summary['failed'].append({'key': None, 'path': path,
+                                          'success': False, 'error': e})
+    return summary
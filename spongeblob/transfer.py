@@ -0,0 +1,157 @@
+"""Transfer objects between storages, like from S3 to WABS, without local
+disk. Parts of an object are fetched with concurrent ranged requests from
+the source storage, and written in order to a
+:py:class:`spongeblob.storage.blobio.BlobWriter` of the destination storage,
+which uploads them as multipart upload parts or blocks concurrently. At most
+`max_concurrency` parts are fetched ahead of the writer, and the writer holds
+at most `max_concurrency` + 1 parts, so a transfer holds at most
+2 * `max_concurrency` + 1 parts in memory.
+"""
+import time
+import logging
+
+from spongeblob.utils import map_ordered
+
+logger = logging.getLogger(__name__)
+
+
+def transfer(source_storage, source_key, destination_storage,
+             destination_key, metadata=None, part_size=None,
+             max_concurrency=None):
+    """Transfer an object from a storage to another, preserving its metadata
+
+    :param source_storage: Storage to read the object from
+    :type source_storage: Union[Storage, RetriableStorage]
+    :param str source_key: Key for object to be transferred
+    :param destination_storage: Storage to write the object to
+    :type destination_storage: Union[Storage, RetriableStorage]
+    :param str destination_key: Key where to store object
+    :param dict metadata: Metadata to be stored along with object. Defaults to
+                          metadata of the source object
+    :param int part_size: Size in bytes of parts fetched and uploaded by a single
+                          request. Defaults to `part_size` of the transfer
+                          profile of destination storage. It is raised to
+                          `MIN_PART_SIZE` of destination storage, and for
+                          objects which would need more than its `MAX_PARTS`
+    :param int max_concurrency: Maximum number of parts fetched, and of parts
+                                uploaded, concurrently. Defaults to
+                                `max_concurrency` of the transfer profile of
+                                destination storage
+    :returns: A dict with transfer statistics. The returned dict will look like this
+              ::
+
+                  {"size": <bytes_transferred>,
+                   "seconds": <time_taken_for_transfer>,
+                   "throughput": <bytes_per_second>}
+
+    :rtype: dict
+    :raises ValueError: If the source object is not found
+
+    :Example:
+        ::
+
+            from spongeblob import setup_storage
+            from spongeblob.transfer import transfer
+
+            s3 = setup_storage('s3',
+                               aws_key='access_key_id',
+                               aws_secret='access_key_secret',
+                               bucket_name='testbucket')
+            wabs = setup_storage('wabs',
+                                 account_name='testaccount',
+                                 container_name='testcontainer',
+                                 sas_token='testtoken')
+            transfer(s3, '/path/to/key', wabs, '/path/to/key')
+
+    """
+    profile = destination_storage.transfer_profile
+    part_size = part_size or profile.part_size
+    max_concurrency = max_concurrency or profile.max_concurrency
+    started = time.time()
+    properties = source_storage.get_object_properties(source_key,
+                                                      metadata=True)
+    if properties is None:
+        raise ValueError('Object {0} not found'.format(source_key))
+    size = properties['size']
+    if metadata is None:
+        metadata = properties['metadata']
+    # Parts are made bigger for objects which would need more than the
+    # maximum number of parts of the destination storage
+    part_size = max(part_size, -(-size // destination_storage.MAX_PARTS),
+                    destination_storage.MIN_PART_SIZE)
+    logger.debug("Transferring {0} to {1} in {2} byte parts"
+                 .format(source_key, destination_key, part_size))
+
+    def read_part(start):
+        end = min(start + part_size, size) - 1
+        return source_storage._read_range(source_key, start, end)
+
+    with destination_storage.open(destination_key, 'wb', metadata=metadata,
+                                  part_size=part_size,
+                                  max_concurrency=max_concurrency) as writer:
+        for data in map_ordered(read_part, range(0, size, part_size),
+                                workers=max_concurrency,
+                                window=max_concurrency):
+            writer.write(data)
+
+    seconds = time.time() - started
+    throughput = size / seconds if seconds else float(size)
+    logger.debug("Transferred {0} bytes in {1:.2f}s at {2:.0f} bytes/s"
+                 .format(size, seconds, throughput))
+    return {'size': size, 'seconds': seconds, 'throughput': throughput}
+
+
+def transfer_prefix(source_storage, source_prefix, destination_storage,
+                    destination_prefix, max_workers=4, part_size=None,
+                    max_concurrency=None):
+    """Transfer all objects matching a prefix from a storage to keys under a
+    prefix of another storage, with the rest of their keys after the prefix.
+    Objects are transferred concurrently with `transfer`, each with its own
+    part concurrency.
+
+    :param source_storage: Storage to read objects from
+    :type source_storage: Union[Storage, RetriableStorage]
+    :param str source_prefix: Prefix of objects to be transferred
+    :param destination_storage: Storage to write objects to
+    :type destination_storage: Union[Storage, RetriableStorage]
+    :param str destination_prefix: Prefix replacing `source_prefix` in keys of
+                                   transferred objects
+    :param int max_workers: Maximum number of objects transferred concurrently
+    :param int part_size: Passed on to `transfer`
+    :param int max_concurrency: Passed on to `transfer`, for each object
+    :returns: A generator of dict describing result of each transfer, in the
+              order of keys. The returned dict will look like this
+              ::
+
+                  {"source_key": "/key/for/source",
+                   "destination_key": "/key/for/destination",
+                   "size": <size_of_object_in_bytes>,
+                   "success": <True if object was transferred, else False>,
+                   "error": Union(<exception_raised>, None),
+                   "seconds": <time_taken_for_transfer>}
+
+    :rtype: Iterator[dict]
+
+    """
+    def run(obj):
+        destination_key = destination_prefix + obj['key'][len(source_prefix):]
+        result = {'source_key': obj['key'],
+                  'destination_key': destination_key,
+                  'size': obj['size'],
+                  'success': True,
+                  'error': None}
+        transfer_started = time.time()
+        try:
+            transfer(source_storage, obj['key'], destination_storage,
+                     destination_key, part_size=part_size,
+                     max_concurrency=max_concurrency)
+        except Exception as e:
+            logger.debug("Transfer of {0} failed: {1}".format(obj['key'], e))
+            result['success'] = False
+            result['error'] = e
+        result['seconds'] = time.time() - transfer_started
+        return result
+
+    return map_ordered(run, source_storage.list_object_keys(source_prefix,
+                                                            prefetch=1),
+                       workers=max_workers)
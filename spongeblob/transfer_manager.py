@@ -0,0 +1,228 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+from spongeblob.retriable_storage import RetriableStorage
+from tenacity import (Retrying,
+                      retry_if_exception_type,
+                      stop_after_attempt,
+                      wait_exponential)
+
+logger = logging.getLogger(__name__)
+
+
+def _file_size(path):
+    """Size of a file, or 0 if it can't be read. Uploads of such files fail,
+    and are reported in their results"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class TransferManager(object):
+    """This class runs uploads and downloads of many files on a shared pool of
+    threads, over any spongeblob storage. Transfers are submitted lazily from
+    the passed iterables, while keeping the bytes of in flight transfers under
+    a limit, and their results are yielded as they finish.
+
+    Every file is transferred with a call to `upload_file` or `download_file`
+    of the storage, retried on the retriable exceptions of these methods with
+    exponential backoff like
+    :py:class:`spongeblob.retriable_storage.RetriableStorage` does. Passing a
+    `RetriableStorage` retries each file with its own retry policy instead.
+    """
+
+    def __init__(self, storage, max_workers=8,
+                 max_inflight_bytes=256 * 1024 * 1024, progress_callback=None,
+                 max_attempts=3, wait_multiplier=2, max_wait_seconds=30):
+        """
+        :param storage: Storage to transfer files with
+        :type storage: Union[Storage, RetriableStorage]
+        :param int max_workers: Maximum number of files transferred concurrently
+        :param int max_inflight_bytes: Maximum total size of files transferred
+                                       concurrently. A file bigger than this is
+                                       transferred alone
+        :param callable progress_callback: Called with a dict of aggregate progress
+                                           after each transfer finishes. The
+                                           dict will look like this
+                                           ::
+
+                                               {"done": <files_transferred>,
+                                                "failed": <files_failed>,
+                                                "bytes": <bytes_transferred>,
+                                                "seconds": <time_since_start>,
+                                                "throughput": <bytes_per_second>}
+
+        :param int max_attempts: Maximum attempts of transferring a file
+        :param int wait_multiplier: Multiplier factor for wait_exponential backoff function
+        :param int max_wait_seconds: Max wait time between attempts
+
+        :Example:
+            ::
+
+                from spongeblob.retriable_storage import RetriableStorage
+                from spongeblob.transfer_manager import TransferManager
+
+                s3 = RetriableStorage('s3',
+                                      aws_key='access_key_id',
+                                      aws_secret='access_key_secret',
+                                      bucket_name='testbucket')
+                manager = TransferManager(s3, max_workers=16)
+                for result in manager.upload_many([('key1', '/path/1'),
+                                                   ('key2', '/path/2')]):
+                    if not result['success']:
+                        print(result['key'], result['error'])
+
+        """
+        self.storage = storage
+        self.max_workers = max_workers
+        self.max_inflight_bytes = max_inflight_bytes
+        self.progress_callback = progress_callback
+        self.max_attempts = max_attempts
+        self.wait_multiplier = wait_multiplier
+        self.max_wait_seconds = max_wait_seconds
+
+    def _call(self, method_name, *args, **kwargs):
+        """Call a transfer method of the storage, retrying its retriable
+        exceptions unless the storage retries them itself"""
+        method = getattr(self.storage, method_name)
+        if isinstance(self.storage, RetriableStorage):
+            return method(*args, **kwargs)
+        retry = Retrying(
+            retry=retry_if_exception_type(
+                self.storage.get_retriable_exceptions(method_name)),
+            reraise=True,
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_exponential(multiplier=self.wait_multiplier,
+                                  max=self.max_wait_seconds))
+        return retry.call(method, *args, **kwargs)
+
+    def upload_many(self, items, metadata=None):
+        """Upload files from local filesystem concurrently
+
+        :param items: An iterable of (destination_key, source_file) tuples, or
+                      (destination_key, source_file, metadata) tuples for
+                      metadata of each object
+        :param dict metadata: Metadata to be stored along with every object
+                              uploaded without metadata of its own
+        :returns: A generator of dict describing result of each upload, in the
+                  order uploads finish. The returned dict will look like this
+                  ::
+
+                      {"key": "/key/for/object",
+                       "path": "/path/on/local/filesystem",
+                       "size": <size_of_file_in_bytes>,
+                       "success": <True if file was transferred, else False>,
+                       "error": Union(<exception_raised>, None),
+                       "seconds": <time_taken_for_transfer>}
+
+        :rtype: Iterator[dict]
+
+        """
+        def upload(key, path, metadata=metadata):
+            self._call('upload_file', key, path, metadata=metadata)
+
+        return self._transfer_many(
+            ((item[0], item[1], _file_size(item[1]),
+              {'metadata': item[2]} if len(item) == 3 else {})
+             for item in items),
+            upload)
+
+    def download_many(self, items):
+        """Download objects to local filesystem concurrently
+
+        :param items: An iterable of (source_key, destination_file) tuples, or
+                      (source_key, destination_file, size) tuples. Sizes are used
+                      to limit in flight bytes, and objects without a size are
+                      not counted against the limit
+        :returns: A generator of dict describing result of each download, as
+                  returned by `upload_many`
+        :rtype: Iterator[dict]
+
+        """
+        def download(key, path):
+            self._call('download_file', key, path)
+
+        return self._transfer_many(
+            ((item[0], item[1], item[2] if len(item) == 3 else None, {})
+             for item in items),
+            download)
+
+    def _transfer_many(self, items, transfer):
+        """Submit transfers of items while under the limits of the manager,
+        and yield results of finished transfers
+
+        :param items: An iterable of (key, path, size, kwargs) tuples
+        :param callable transfer: A function transferring a key and a path,
+                                  called with kwargs of the item as well
+        :returns: A generator of dicts describing result of each transfer
+        :rtype: Iterator[dict]
+
+        """
+        finished = Queue()
+        progress = {'done': 0, 'failed': 0, 'bytes': 0, 'seconds': 0,
+                    'throughput': 0}
+        started = time.time()
+        pending = {'count': 0, 'bytes': 0}
+
+        def run(key, path, size, kwargs):
+            result = {'key': key, 'path': path, 'size': size,
+                      'success': True, 'error': None}
+            transfer_started = time.time()
+            try:
+                transfer(key, path, **kwargs)
+                if size is None:
+                    result['size'] = os.path.getsize(path)
+            except Exception as e:
+                logger.debug("Transfer of {0} failed: {1}".format(key, e))
+                result['success'] = False
+                result['error'] = e
+            result['seconds'] = time.time() - transfer_started
+            finished.put((result, size or 0))
+
+        def collect(block):
+            result, size = finished.get(block=block)
+            pending['count'] -= 1
+            pending['bytes'] -= size
+            if result['success']:
+                progress['done'] += 1
+                progress['bytes'] += result['size']
+            else:
+                progress['failed'] += 1
+            progress['seconds'] = time.time() - started
+            if progress['seconds']:
+                progress['throughput'] = (progress['bytes'] /
+                                          progress['seconds'])
+            if self.progress_callback is not None:
+                self.progress_callback(dict(progress))
+            return result
+
+        def has_capacity(size):
+            return pending['count'] == 0 or (
+                pending['count'] < self.max_workers * 2 and
+                pending['bytes'] + (size or 0) <= self.max_inflight_bytes)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for key, path, size, kwargs in items:
+                while not has_capacity(size):
+                    yield collect(block=True)
+                executor.submit(run, key, path, size, kwargs)
+                pending['count'] += 1
+                pending['bytes'] += size or 0
+                while True:
+                    try:
+                        yield collect(block=False)
+                    except Empty:
+                        break
+            while pending['count']:
+                yield collect(block=True)
+        finally:
+            executor.shutdown(wait=True)
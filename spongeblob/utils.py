@@ -0,0 +1,311 @@
+import os
+import sys
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from types import ModuleType
+
+try:
+    from queue import Queue, Full
+except ImportError:
+    from Queue import Queue, Full
+
+
+class _Done(object):
+    """Marker put on the queue by a worker once it runs out of iterables"""
+
+
+class _Raised(object):
+    """Wrapper for an exception raised by a source iterable, so that it can
+    be re-raised in the consumer thread"""
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+class BackgroundIterator(object):
+    """Iterate over one or more iterables in background threads, keeping up to
+    `depth` items ready ahead of the consumer. `workers` iterables are consumed
+    concurrently, and items of a single iterable are always yielded in their
+    order. Exceptions raised by an iterable are re-raised to the consumer.
+    Background threads are started as soon as the object is created, and stop
+    after the item they are currently fetching once `close` is called.
+    """
+
+    def __init__(self, iterables, workers=1, depth=1):
+        """
+        :param iterables: An iterable of iterables, typically generators of api pages
+        :param int workers: Number of iterables consumed concurrently
+        :param int depth: Maximum number of items fetched ahead of the consumer
+        """
+        self._items = Queue(maxsize=max(depth, 1))
+        self._stopped = threading.Event()
+        self._sources = iter(iterables)
+        self._sources_lock = threading.Lock()
+        self._running = workers
+        for _ in range(workers):
+            worker = threading.Thread(target=self._produce)
+            worker.daemon = True
+            worker.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._items.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _next_source(self):
+        with self._sources_lock:
+            return next(self._sources, None)
+
+    def _produce(self):
+        try:
+            source = self._next_source()
+            while source is not None:
+                for item in source:
+                    if not self._put(item):
+                        return
+                source = self._next_source()
+            self._put(_Done)
+        except Exception as e:
+            self._put(_Raised(e))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self._running:
+            item = self._items.get()
+            if item is _Done:
+                self._running -= 1
+            elif isinstance(item, _Raised):
+                self.close()
+                raise item.exception
+            else:
+                return item
+        raise StopIteration
+
+    next = __next__
+
+    def close(self):
+        """Stop background threads and discard prefetched items"""
+        self._running = 0
+        self._stopped.set()
+
+
+def prefetch(iterable, depth=1):
+    """Iterate over `iterable` in a background thread, keeping up to `depth`
+    items ready ahead of the consumer.
+
+    :param iterable: Any iterable, typically a generator of api pages
+    :param int depth: Maximum number of items fetched ahead of the consumer
+    :returns: An iterator yielding items of `iterable` in the same order
+    :rtype: BackgroundIterator
+
+    """
+    return BackgroundIterator([iterable], depth=depth)
+
+
+def interleave(iterables, workers, depth=1):
+    """Iterate over `workers` iterables concurrently in background threads and
+    yield their items as soon as they are available. Items of a single iterable
+    keep their order, but are interleaved with items of other iterables.
+
+    :param iterables: An iterable of iterables
+    :param int workers: Number of iterables consumed concurrently
+    :param int depth: Maximum number of items fetched ahead of the consumer
+    :returns: An iterator yielding items of all iterables
+    :rtype: BackgroundIterator
+
+    """
+    return BackgroundIterator(iterables, workers=workers, depth=depth)
+
+
+def chunked(iterable, size):
+    """Split an iterable into lists of `size` items, the last list holding
+    the remaining items
+
+    :param iterable: Any iterable
+    :param int size: Maximum number of items in a chunk
+    :returns: A generator of lists
+    :rtype: Iterator[list]
+
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_write_lock = threading.Lock()
+
+
+def write_at(fd, data, offset):
+    """Write all of `data` to the file descriptor `fd` at `offset`, without
+    moving the file position shared by concurrent writers. Uses `os.pwrite`
+    where available and falls back to a locked seek and write.
+
+    :param int fd: A file descriptor opened for writing
+    :param bytes data: Data to be written
+    :param int offset: Position in the file to write data at
+    :returns: Nothing
+    :rtype: None
+
+    """
+    data = memoryview(data)
+    if hasattr(os, 'pwrite'):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+    else:
+        with _write_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+
+
+def map_ordered(func, iterable, workers, window=None):
+    """Apply `func` to items of `iterable` on a pool of `workers` threads,
+    yielding results in the order of items. At most `window` calls are
+    submitted ahead of the consumer, so that items are consumed lazily.
+
+    :param callable func: Function called with each item
+    :param iterable: Any iterable
+    :param int workers: Number of threads calling `func` concurrently
+    :param int window: Maximum number of pending calls, defaults to twice `workers`
+    :returns: A generator of results of `func`
+    :rtype: Iterator
+
+    """
+    window = window or workers * 2
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = deque()
+    try:
+        for item in iterable:
+            futures.append(executor.submit(func, item))
+            if len(futures) >= window:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def file_md5(path, block_size=1024 * 1024):
+    """Compute the md5 checksum of a file, reading it in blocks
+
+    :param str path: Path of the file on local filesystem
+    :param int block_size: Size in bytes of blocks read at a time
+    :returns: Hex digest of the md5 checksum
+    :rtype: str
+
+    """
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def file_checksums(path, part_size, block_size=1024 * 1024):
+    """Compute the md5 checksum of a file, and the ETag S3 assigns to it
+    when uploaded in parts of `part_size`, in a single pass over the file.
+    The ETag of a multipart upload is the md5 of the concatenated md5
+    digests of its parts, followed by the number of parts.
+
+    :param str path: Path of the file on local filesystem
+    :param int part_size: Size in bytes of parts of a multipart upload
+    :param int block_size: Size in bytes of blocks read at a time
+    :returns: Hex digest of the md5 checksum, and the multipart ETag
+    :rtype: tuple(str, str)
+
+    """
+    md5 = hashlib.md5()
+    part_digests = []
+    with open(path, 'rb') as f:
+        while True:
+            part_md5 = hashlib.md5()
+            remaining = part_size
+            while remaining:
+                block = f.read(min(block_size, remaining))
+                if not block:
+                    break
+                md5.update(block)
+                part_md5.update(block)
+                remaining -= len(block)
+            if remaining == part_size:
+                break
+            part_digests.append(part_md5.digest())
+            if remaining:
+                break
+    multipart_etag = '{0}-{1}'.format(
+        hashlib.md5(b''.join(part_digests)).hexdigest(), len(part_digests))
+    return md5.hexdigest(), multipart_etag
+
+
+def get_metadata(metadata, name):
+    """Look up a metadata value stored by spongeblob. Metadata keys come
+    back lowercased from S3, and may have underscores replaced by hyphens
+    on the way, so keys are compared after normalizing both.
+
+    :param dict metadata: Metadata of an object, or None
+    :param str name: Key of the metadata value, with underscores
+    :returns: The metadata value, or None if not found
+    :rtype: str
+
+    """
+    for key, value in (metadata or {}).items():
+        if key.lower().replace('-', '_') == name:
+            return value
+    return None
+
+
+# Modules replaced in `sys.modules` by `lazy_attributes`. Python 2 clears the
+# globals of a module once it is collected, which its functions still use
+_replaced_modules = []
+
+
+def lazy_attributes(module_name, names, loader):
+    """Resolve attributes of a module on first access, typically to import
+    slow dependencies only when used. This is called at the end of the module,
+    and supports python versions without module level ``__getattr__``.
+
+    :param str module_name: Name of the module in `sys.modules`
+    :param names: Names of the attributes resolved on first access
+    :param loader: Function called with the name of an attribute, returning
+                   its value
+    """
+    module = sys.modules[module_name]
+
+    class LazyModule(ModuleType):
+        def __getattr__(self, name):
+            if name not in names:
+                raise AttributeError("module {0!r} has no attribute {1!r}"
+                                     .format(self.__name__, name))
+            value = loader(name)
+            setattr(self, name, value)
+            return value
+
+        def __dir__(self):
+            return sorted(set(self.__dict__) | set(names))
+
+    if sys.version_info >= (3, 5):
+        module.__class__ = LazyModule
+    else:
+        # The class of a module can't be changed before python 3.5, so the
+        # module is replaced with a lazy module holding its attributes
+        lazy_module = LazyModule(module_name)
+        lazy_module.__dict__.update(module.__dict__)
+        _replaced_modules.append(module)
+        sys.modules[module_name] = lazy_module
@@ -1,10 +1,18 @@
 import os
+import sys
 import socket
 import pytest
 
 import boto3
+import spongeblob as sb
 from azure.storage.blob import BlockBlobService
 
+# AsyncStorage uses async generators, which don't compile before python 3.6,
+# so its tests can't be collected to be skipped there
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore.append('test_async_storage.py')
+
 
 def pytest_addoption(parser):
     parser.addoption("--no-docker", action="store_true", default=False,
@@ -138,3 +146,23 @@ def lowlevel_storage_clients(blob_services, test_data, test_with_docker):
                                                is_emulated=True)
             clients['wabs'].create_container(test_creds['wabs']['container_name'])
     return clients
+
+
+@pytest.fixture(scope='module')
+def storage_clients(request, blob_services, lowlevel_storage_clients,
+                    test_data, test_with_docker):
+    """Storage clients of every tested provider, set up with `setup_storage`.
+    Modules testing a wrapper storage parametrize this fixture indirectly
+    with a function called with a provider and its credentials instead. The
+    low level clients of docker services are set on the storage a wrapper
+    keeps as `_storage`."""
+    storage_class = getattr(request, 'param', sb.setup_storage)
+    test_creds = test_data['creds']
+    clients = {provider: storage_class(provider, **test_creds[provider])
+               for provider in test_data['providers']}
+
+    if test_with_docker:
+        for provider, client in clients.items():
+            storage = getattr(client, '_storage', client)
+            storage.client = lowlevel_storage_clients[provider]
+    return clients
@@ -0,0 +1,38 @@
+from spongeblob.async_storage import AsyncStorage
+import pytest
+
+
+pytestmark = pytest.mark.parametrize('storage_clients', [AsyncStorage],
+                                     indirect=True)
+
+
+def run(coroutine):
+    import asyncio
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def test_async_storage(test_data, test_provider, upload_file, download_file,
+                       storage_clients):
+    test_prefix = test_data['prefix'] + '_async/'
+    test_key = test_prefix + 'test.txt'
+    storage_client = storage_clients[test_provider]
+
+    async def list_keys():
+        return [obj['key'] async for obj in
+                storage_client.list_object_keys(test_prefix, pagesize=1)]
+
+    run(storage_client.upload_file(test_key, upload_file,
+                                   metadata={"key1": "metadata1"}))
+    run(storage_client.copy_from_key(test_key, test_key + '.copy'))
+    object_keys = run(list_keys())
+    obj_data = run(storage_client.get_object_properties(test_key,
+                                                        metadata=True))
+    run(storage_client.download_file(test_key + '.copy', download_file))
+    run(storage_client.delete_key(test_key))
+    run(storage_client.delete_key(test_key + '.copy'))
+
+    assert object_keys == [test_key, test_key + '.copy']
+    assert obj_data['metadata']['key1'] == 'metadata1'
+    with open(download_file, 'r') as f:
+        assert f.read() == test_data['filecontents']
+    assert run(list_keys()) == []
@@ -0,0 +1,56 @@
+import tempfile
+import spongeblob as sb
+from spongeblob.caching_storage import CachingStorage
+import pytest
+
+
+def caching_storage(provider, **kwargs):
+    return CachingStorage(sb.setup_storage(provider, **kwargs),
+                          tempfile.mkdtemp(), max_bytes=1024)
+
+
+pytestmark = pytest.mark.parametrize('storage_clients', [caching_storage],
+                                     indirect=True)
+
+
+def test_download_file_cached(test_data, test_provider, upload_file,
+                              download_file, storage_clients):
+    test_key = test_data['prefix'] + '_cache/test.txt'
+    storage_client = storage_clients[test_provider]
+    storage_client.upload_file(test_key, upload_file)
+
+    storage_client.download_file(test_key, download_file)
+    storage_client.download_file(test_key, download_file)
+    stats = storage_client.stats()
+    with open(download_file, 'r') as f:
+        contents = f.read()
+
+    storage_client.delete_key(test_key)
+    assert storage_client.stats()['entries'] == 0
+
+    assert contents == test_data['filecontents']
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['bytes'] == len(test_data['filecontents'])
+
+
+def test_writes_invalidate_cache(test_data, test_provider, upload_file,
+                                 download_file, storage_clients):
+    test_prefix = test_data['prefix'] + '_cache_writes/'
+    test_key = test_prefix + 'test.txt'
+    storage_client = storage_clients[test_provider]
+    storage_client.upload_file(test_key, upload_file)
+
+    storage_client.download_file(test_key, download_file)
+    with storage_client.open(test_key, 'wb') as f:
+        f.write(b'rewritten')
+    entries_after_write = storage_client.stats()['entries']
+    storage_client.download_file(test_key, download_file)
+    with open(download_file, 'rb') as f:
+        contents = f.read()
+    deletes = list(storage_client.delete_prefix(test_prefix))
+
+    assert entries_after_write == 0
+    assert contents == b'rewritten'
+    assert [result['deleted'] for result in deletes] == [True]
+    assert storage_client.stats()['entries'] == 0
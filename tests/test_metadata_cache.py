@@ -0,0 +1,37 @@
+import spongeblob as sb
+from spongeblob.metadata_cache import MetadataCachingStorage
+import pytest
+
+
+def metadata_caching_storage(provider, **kwargs):
+    return MetadataCachingStorage(sb.setup_storage(provider, **kwargs), ttl=60)
+
+
+pytestmark = pytest.mark.parametrize('storage_clients',
+                                     [metadata_caching_storage], indirect=True)
+
+
+def test_metadata_cache_invalidation(test_data, test_provider, upload_file,
+                                     storage_clients):
+    test_prefix = test_data['prefix'] + '_metadata_cache/'
+    test_key = test_prefix + 'test.txt'
+    storage_client = storage_clients[test_provider]
+
+    missing_properties = storage_client.get_object_properties(test_key)
+    empty_listing = storage_client.list_object_keys_flat(test_prefix)
+    storage_client.upload_file(test_key, upload_file)
+    properties = storage_client.get_object_properties(test_key)
+    listing = storage_client.list_object_keys_flat(test_prefix)
+    cached_listing = storage_client.list_object_keys_flat(test_prefix)
+    stats = storage_client.stats()
+    storage_client.delete_key(test_key)
+    deleted_properties = storage_client.get_object_properties(test_key)
+
+    assert missing_properties is None
+    assert empty_listing == []
+    assert properties['size'] == len(test_data['filecontents'])
+    assert [obj['key'] for obj in listing] == [test_key]
+    assert cached_listing == listing
+    assert stats['hits'] == 1
+    assert stats['misses'] == 4
+    assert deleted_properties is None
@@ -0,0 +1,59 @@
+from spongeblob.retriable_storage import RetriableStorage
+from spongeblob.prefix_copy import copy_prefix, move_prefix
+import pytest
+
+
+pytestmark = pytest.mark.parametrize('storage_clients', [RetriableStorage],
+                                     indirect=True)
+
+
+def test_copy_move_prefix(test_data, test_provider, tmpdir, storage_clients):
+    test_prefix = test_data['prefix'] + '_prefix_copy/'
+    checkpoint_file = str(tmpdir.join('checkpoint.json'))
+    storage_client = storage_clients[test_provider]
+    for name in ('a.txt', 'nested/b.txt'):
+        storage_client.upload_bytes(test_prefix + 'source/' + name, b'data')
+
+    copies = list(copy_prefix(storage_client, test_prefix + 'source/',
+                              test_prefix + 'copy/',
+                              checkpoint_file=checkpoint_file))
+    moves = list(move_prefix(storage_client, test_prefix + 'copy/',
+                             test_prefix + 'moved/',
+                             checkpoint_file=checkpoint_file))
+    keys = [obj['key'] for obj in
+            storage_client.list_object_keys(test_prefix)]
+    list(storage_client.delete_prefix(test_prefix))
+
+    assert [result['copied'] for result in copies] == [True, True]
+    assert [result['deleted'] for result in moves] == [True, True]
+    assert keys == [test_prefix + 'moved/a.txt',
+                    test_prefix + 'moved/nested/b.txt',
+                    test_prefix + 'source/a.txt',
+                    test_prefix + 'source/nested/b.txt']
+    assert not tmpdir.join('checkpoint.json').exists()
+
+
+def test_copy_prefix_overlapping(test_data, test_provider, storage_clients):
+    test_prefix = test_data['prefix'] + '_prefix_copy/'
+    storage_client = storage_clients[test_provider]
+
+    with pytest.raises(ValueError):
+        copy_prefix(storage_client, test_prefix, test_prefix + 'copy/')
+    with pytest.raises(ValueError):
+        move_prefix(storage_client, test_prefix, test_prefix + 'moved/')
+
+
+def test_move_prefix_copy_checkpoint(test_data, test_provider, tmpdir,
+                                     storage_clients):
+    test_prefix = test_data['prefix'] + '_prefix_copy/'
+    checkpoint_file = tmpdir.join('checkpoint.json')
+    checkpoint_file.write('{"source_prefix": "%ssource/", '
+                          '"destination_prefix": "%smoved/", '
+                          '"delete": false, "last_key": null}'
+                          % (test_prefix, test_prefix))
+    storage_client = storage_clients[test_provider]
+
+    with pytest.raises(ValueError):
+        list(move_prefix(storage_client, test_prefix + 'source/',
+                         test_prefix + 'moved/',
+                         checkpoint_file=str(checkpoint_file)))
@@ -73,6 +73,32 @@ def test_pagination(test_data, test_provider, storage_clients):
                storage_client.list_object_keys(test_prefix, pagesize=1)) == 2
 
 
+def test_list_object_keys_resume(test_data, test_provider, storage_clients,
+                                 monkeypatch):
+    test_prefix = test_data['prefix']
+    storage_client = storage_clients[test_provider]
+    list_pages = storage_client._storage._list_pages
+    retriable_exception = storage_client._storage.get_retriable_exceptions(
+        'list_object_keys')[0]
+    markers = []
+
+    def flaky_list_pages(*args, **kwargs):
+        markers.append(kwargs.get('marker'))
+        for page_number, page in enumerate(list_pages(*args, **kwargs)):
+            if len(markers) == 1 and page_number == 1:
+                raise retriable_exception()
+            yield page
+
+    monkeypatch.setattr(storage_client._storage, '_list_pages',
+                        flaky_list_pages)
+    monkeypatch.setattr(storage_client, 'wait_multiplier', 0)
+    keys = [obj['key'] for obj in
+            storage_client.list_object_keys(test_prefix, pagesize=1)]
+
+    assert sorted(keys) == sorted([test_data['file1'], test_data['file2']])
+    assert len(markers) == 2
+
+
 def test_list_object_keys_flat(test_data, test_provider, storage_clients):
     test_file1 = test_data['file1']
     test_file2 = test_data['file2']
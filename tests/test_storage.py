@@ -1,3 +1,5 @@
+import gc
+import io
 import spongeblob as sb
 import pytest
 from azure.common import AzureMissingResourceHttpError
@@ -64,6 +66,25 @@ def test_copy_from_key(test_data, test_provider, storage_clients):
     assert obj_data['key'] == test_file2
 
 
+def test_copy_keys(test_data, test_provider, storage_clients):
+    test_file1 = test_data['file1']
+    test_prefix = test_data['prefix'] + '_copies/'
+    storage_client = storage_clients[test_provider]
+    keys = [(test_file1, test_prefix + str(i)) for i in range(3)]
+    keys.append((test_data['prefix'] + '/missing', test_prefix + 'missing'))
+    results = list(storage_client.copy_keys(keys))
+    handle = storage_client.start_copy(test_file1, test_prefix + 'handle')
+    storage_client.wait_copies([handle])
+    copied_keys = [obj['key'] for obj in
+                   storage_client.list_object_keys(test_prefix)]
+    list(storage_client.delete_prefix(test_prefix))
+
+    assert [result['copied'] for result in results] == [True] * 3 + [False]
+    assert results[-1]['error'] is not None
+    assert handle.succeeded
+    assert len(copied_keys) == 4
+
+
 # following test passes but doesn't work correctly for paginators with fakes3,
 # but works on s3
 def test_pagination(test_data, test_provider, storage_clients):
@@ -73,6 +94,18 @@ def test_pagination(test_data, test_provider, storage_clients):
                storage_client.list_object_keys(test_prefix, pagesize=1)) == 2
 
 
+def test_pagination_prefetch(test_data, test_provider, storage_clients):
+    test_prefix = test_data['prefix']
+    storage_client = storage_clients[test_provider]
+    object_list = list(storage_client.list_object_keys(test_prefix,
+                                                       metadata=True,
+                                                       pagesize=1,
+                                                       prefetch=2))
+    assert [obj['key'] for obj in object_list] == [test_data['file1'],
+                                                   test_data['file2']]
+    assert object_list[1]['metadata']['key1'] == 'metadata1'
+
+
 def test_list_object_keys_flat(test_data, test_provider, storage_clients):
     test_file1 = test_data['file1']
     test_file2 = test_data['file2']
@@ -91,6 +124,36 @@ def test_list_object_keys_flat(test_data, test_provider, storage_clients):
     assert object_list[1]['metadata']['key1'] == 'metadata1'
 
 
+def test_list_object_keys_parallel(test_data, test_provider, storage_clients):
+    test_prefix = test_data['prefix']
+    storage_client = storage_clients[test_provider]
+    object_list = list(storage_client.list_object_keys(test_prefix))
+    parallel_list = list(storage_client.list_object_keys_parallel(
+        test_prefix, pagesize=1, max_workers=2))
+    unordered_list = list(storage_client.list_object_keys_parallel(
+        test_prefix, pagesize=1, max_workers=2, ordered=False))
+
+    assert parallel_list == object_list
+    assert sorted(obj['key'] for obj in unordered_list) == \
+        [obj['key'] for obj in object_list]
+
+
+def test_list_object_keys_parallel_flat(test_data, test_provider,
+                                        upload_file, storage_clients):
+    flat_prefix = test_data['prefix'] + '_flat'
+    storage_client = storage_clients[test_provider]
+    for i in range(12):
+        storage_client.upload_file('{0}{1:02d}'.format(flat_prefix, i),
+                                   upload_file)
+    object_list = list(storage_client.list_object_keys(flat_prefix))
+    parallel_list = list(storage_client.list_object_keys_parallel(
+        flat_prefix, pagesize=2, max_workers=3))
+    list(storage_client.delete_prefix(flat_prefix))
+
+    assert len(object_list) == 12
+    assert parallel_list == object_list
+
+
 def test_get_object_properties(test_data, test_provider, storage_clients):
     test_file1 = test_data['file1']
     test_file2 = test_data['file2']
@@ -110,6 +173,21 @@ def test_get_object_properties(test_data, test_provider, storage_clients):
     assert test_bogus_object is None
     assert test_prefix_object is None
 
+
+def test_get_object_properties_many(test_data, test_provider,
+                                    storage_clients):
+    test_file1 = test_data['file1']
+    test_file2 = test_data['file2']
+    storage_client = storage_clients[test_provider]
+    test_objects = list(storage_client.get_object_properties_many(
+        [test_file1, "bogus", test_file2], metadata=True))
+
+    assert test_objects[0]['key'] == test_file1
+    assert test_objects[0]['metadata']['key1'] == 'metadata1'
+    assert test_objects[1] is None
+    assert test_objects[2]['key'] == test_file2
+
+
 @pytest.mark.xfail(raises=StopIteration)
 def test_delete_key_test1(test_data, test_provider, storage_clients):
     test_file1 = test_data['file1']
@@ -141,3 +219,222 @@ def test_list_objects_keys_again(test_data, test_provider, storage_clients):
     test_prefix = test_data['prefix']
     storage_client = storage_clients[test_provider]
     next(storage_client.list_object_keys(test_prefix))
+
+
+def test_delete_prefix(test_data, test_provider, upload_file, storage_clients):
+    bulk_prefix = test_data['prefix'] + '_bulk/'
+    bulk_keys = [bulk_prefix + 'test{0}.txt'.format(i) for i in range(3)]
+    storage_client = storage_clients[test_provider]
+    for key in bulk_keys:
+        storage_client.upload_file(key, upload_file)
+
+    results = list(storage_client.delete_keys(bulk_keys[:1]))
+    assert results == [{'key': bulk_keys[0], 'deleted': True, 'error': None}]
+
+    results = list(storage_client.delete_prefix(bulk_prefix))
+    assert [result['key'] for result in results] == bulk_keys[1:]
+    assert all(result['deleted'] for result in results)
+    assert list(storage_client.list_object_keys(bulk_prefix)) == []
+
+
+def test_download_file_parallel(test_data, test_provider, upload_file,
+                                download_file, storage_clients):
+    test_key = test_data['prefix'] + '_parallel/test.txt'
+    test_filecontents = test_data['filecontents']
+    storage_client = storage_clients[test_provider]
+    storage_client.upload_file(test_key, upload_file)
+    stats = storage_client.download_file_parallel(test_key, download_file,
+                                                  part_size=4,
+                                                  max_concurrency=3)
+    storage_client.delete_key(test_key)
+
+    assert stats['size'] == len(test_filecontents)
+    with open(download_file, 'r') as f:
+        assert f.read() == test_filecontents
+
+
+def test_upload_download_bytes(test_data, test_provider, storage_clients):
+    test_key = test_data['prefix'] + '_bytes/test.txt'
+    test_bytes = test_data['filecontents'].encode('utf-8')
+    storage_client = storage_clients[test_provider]
+    storage_client.upload_bytes(test_key, memoryview(test_bytes),
+                                metadata={"key1": "metadata1"})
+    downloaded_bytes = storage_client.download_bytes(test_key)
+    download_fd = io.BytesIO()
+    storage_client.download_file_obj(test_key, download_fd)
+    storage_client.delete_key(test_key)
+
+    assert downloaded_bytes == test_bytes
+    assert download_fd.getvalue() == test_bytes
+
+
+def test_open_read(test_data, test_provider, storage_clients):
+    test_key = test_data['prefix'] + '_open/test.txt'
+    test_bytes = test_data['filecontents'].encode('utf-8')
+    storage_client = storage_clients[test_provider]
+    storage_client.upload_bytes(test_key, test_bytes)
+    with storage_client.open(test_key, 'rb', block_size=4,
+                             cache_blocks=2) as f:
+        contents = f.read()
+        f.seek(-8, io.SEEK_END)
+        footer = f.read()
+        f.seek(3)
+        partial = f.read(5)
+    storage_client.delete_key(test_key)
+
+    assert contents == test_bytes
+    assert footer == test_bytes[-8:]
+    assert partial == test_bytes[3:8]
+
+
+def test_open_write(test_data, test_provider, storage_clients):
+    test_key = test_data['prefix'] + '_open/test.txt'
+    test_bytes = test_data['filecontents'].encode('utf-8')
+    storage_client = storage_clients[test_provider]
+    with storage_client.open(test_key, 'wb',
+                             metadata={"key1": "metadata1"}) as f:
+        f.write(test_bytes[:5])
+        f.write(test_bytes[5:])
+    downloaded_bytes = storage_client.download_bytes(test_key)
+    obj_data = storage_client.get_object_properties(test_key, metadata=True)
+    storage_client.delete_key(test_key)
+
+    assert downloaded_bytes == test_bytes
+    assert obj_data['metadata']['key1'] == 'metadata1'
+
+
+def test_open_write_abandoned(test_data, test_provider, storage_clients):
+    test_key = test_data['prefix'] + '_open/abandoned.txt'
+    storage_client = storage_clients[test_provider]
+    f = storage_client.open(test_key, 'wb')
+    f.write(b'partial')
+    del f
+    gc.collect()
+
+    assert storage_client.get_object_properties(test_key) is None
+
+
+def test_transfer_profile(test_data, test_provider):
+    profile = sb.TransferProfile.from_preset('few_huge_objects',
+                                             max_concurrency=3)
+    storage_client = sb.setup_storage(test_provider,
+                                      transfer_profile=profile,
+                                      **test_data['creds'][test_provider])
+    assert storage_client.transfer_profile is profile
+    assert storage_client.transfer_profile.max_concurrency == 3
+
+    with pytest.raises(ValueError):
+        sb.setup_storage(test_provider, transfer_profile='bogus',
+                         **test_data['creds'][test_provider])
+
+
+def test_client_pool(test_data, test_provider):
+    creds = test_data['creds'][test_provider]
+    first = sb.setup_storage(test_provider, **creds)
+    second = sb.setup_storage(test_provider, **creds)
+    other_profile = sb.setup_storage(test_provider,
+                                     transfer_profile='few_huge_objects',
+                                     **creds)
+    unshared_pool = sb.ClientPool(max_clients=0)
+    unshared = sb.setup_storage(test_provider, client_pool=unshared_pool,
+                                **creds)
+
+    assert first.client is second.client
+    assert other_profile.client is not first.client
+    assert unshared.client is not first.client
+    assert len(unshared_pool) == 0
+
+
+def test_upload_skip_if_identical(test_data, test_provider, upload_file,
+                                  storage_clients):
+    test_key = test_data['prefix'] + '_skip/test.txt'
+    storage_client = storage_clients[test_provider]
+
+    first_upload = storage_client.upload_file(test_key, upload_file,
+                                              skip_if_identical=True)
+    second_upload = storage_client.upload_file(test_key, upload_file,
+                                               skip_if_identical=True)
+    storage_client.upload_bytes(test_key, b'changed')
+    changed_upload = storage_client.upload_file(test_key, upload_file,
+                                                skip_if_identical=True)
+    storage_client.delete_key(test_key)
+
+    assert first_upload is True
+    assert second_upload is False
+    assert changed_upload is True
+
+
+def test_upload_download_checksum(test_data, test_provider, upload_file,
+                                  download_file, storage_clients):
+    test_key = test_data['prefix'] + '_checksum/test.txt'
+    storage_client = storage_clients[test_provider]
+
+    storage_client.upload_file(test_key, upload_file, metadata={'a': 'b'},
+                               checksum='md5')
+    metadata = storage_client.get_object_properties(test_key,
+                                                    metadata=True)['metadata']
+    storage_client.download_file(test_key, download_file,
+                                 verify_checksum=True)
+    with open(download_file, 'r') as f:
+        contents = f.read()
+    storage_client._update_metadata(test_key, {'spongeblob_md5': '0' * 32})
+    with pytest.raises(sb.ChecksumMismatchError):
+        storage_client.download_file(test_key, download_file,
+                                     verify_checksum=True)
+    storage_client.delete_key(test_key)
+
+    assert contents == test_data['filecontents']
+    assert len(metadata) == 2
+    assert sb.ChecksumMismatchError in \
+        storage_client.get_retriable_exceptions('download_file')
+
+
+@pytest.mark.parametrize('codec', ['gzip', 'zstd'])
+def test_upload_download_codec(test_data, test_provider, upload_file,
+                               download_file, storage_clients, codec):
+    if codec == 'zstd':
+        pytest.importorskip('zstandard')
+    test_key = test_data['prefix'] + '_codec/test.txt'
+    storage_client = storage_clients[test_provider]
+
+    storage_client.upload_file(test_key, upload_file, checksum='md5',
+                               codec=codec)
+    storage_client.download_file(test_key, download_file,
+                                 verify_checksum=True)
+    with open(download_file, 'r') as f:
+        contents = f.read()
+    storage_client.download_file(test_key, download_file,
+                                 verify_checksum=True, decode=False)
+    with open(download_file, 'rb') as f:
+        encoded_contents = f.read()
+    skipped = not storage_client.upload_file(test_key, upload_file,
+                                             skip_if_identical=True,
+                                             codec=codec)
+    skipped_other_codec = not storage_client.upload_file(
+        test_key, upload_file, skip_if_identical=True)
+    storage_client.delete_key(test_key)
+
+    assert contents == test_data['filecontents']
+    assert encoded_contents != test_data['filecontents'].encode('utf-8')
+    assert skipped
+    assert not skipped_other_codec
+
+
+def test_list_prefixes(test_data, test_provider, storage_clients):
+    test_prefix = test_data['prefix'] + '_prefixes/'
+    storage_client = storage_clients[test_provider]
+    for key in ('dt=1/hour=00/a', 'dt=1/hour=01/a', 'dt=2/hour=00/a',
+                'top.txt'):
+        storage_client.upload_bytes(test_prefix + key, b'data')
+
+    prefixes = list(storage_client.list_prefixes(test_prefix))
+    hours = list(storage_client.list_prefixes(test_prefix + 'dt=1/'))
+    entries = list(storage_client.list_object_keys(test_prefix,
+                                                   delimiter='/'))
+    list(storage_client.delete_prefix(test_prefix))
+
+    assert prefixes == [test_prefix + 'dt=1/', test_prefix + 'dt=2/']
+    assert hours == [test_prefix + 'dt=1/hour=00/',
+                     test_prefix + 'dt=1/hour=01/']
+    assert [entry.get('prefix', entry.get('key')) for entry in entries] == \
+        [test_prefix + 'dt=1/', test_prefix + 'dt=2/', test_prefix + 'top.txt']
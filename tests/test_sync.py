@@ -0,0 +1,41 @@
+from spongeblob.retriable_storage import RetriableStorage
+from spongeblob.sync import sync_up, sync_down
+import pytest
+
+
+pytestmark = pytest.mark.parametrize('storage_clients', [RetriableStorage],
+                                     indirect=True)
+
+
+@pytest.mark.parametrize('checksum', [False, True])
+def test_sync_up_down(test_data, test_provider, tmpdir_factory,
+                      storage_clients, checksum):
+    test_prefix = test_data['prefix'] + '_sync/'
+    source_dir = tmpdir_factory.mktemp(test_data['prefix'])
+    destination_dir = tmpdir_factory.mktemp(test_data['prefix'])
+    storage_client = storage_clients[test_provider]
+    source_dir.join('a.txt').write('a')
+    source_dir.join('nested', 'b.txt').write('bb', ensure=True)
+    destination_dir.join('extra.txt').write('extra')
+
+    first_up = sync_up(storage_client, str(source_dir), test_prefix,
+                       checksum=checksum)
+    second_up = sync_up(storage_client, str(source_dir), test_prefix,
+                        checksum=checksum)
+    source_dir.join('a.txt').remove()
+    deleting_up = sync_up(storage_client, str(source_dir), test_prefix,
+                          delete=True, checksum=checksum)
+    first_down = sync_down(storage_client, test_prefix, str(destination_dir),
+                           delete=True, checksum=checksum)
+    second_down = sync_down(storage_client, test_prefix,
+                            str(destination_dir), checksum=checksum)
+    list(storage_client.delete_prefix(test_prefix))
+
+    assert (first_up['transferred'], first_up['bytes']) == (2, 3)
+    assert (second_up['transferred'], second_up['unchanged']) == (0, 2)
+    assert (deleting_up['deleted'], deleting_up['unchanged']) == (1, 1)
+    assert (first_down['transferred'], first_down['deleted']) == (1, 1)
+    assert (second_down['transferred'], second_down['unchanged']) == (0, 1)
+    assert destination_dir.join('nested', 'b.txt').read() == 'bb'
+    assert not destination_dir.join('extra.txt').exists()
+    assert not first_up['failed'] and not first_down['failed']
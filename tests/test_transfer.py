@@ -0,0 +1,29 @@
+from spongeblob.retriable_storage import RetriableStorage
+from spongeblob.transfer import transfer, transfer_prefix
+import pytest
+
+
+pytestmark = pytest.mark.parametrize('storage_clients', [RetriableStorage],
+                                     indirect=True)
+
+
+def test_transfer(test_data, test_provider, storage_clients):
+    test_prefix = test_data['prefix'] + '_transfer/'
+    storage_client = storage_clients[test_provider]
+    storage_client.upload_bytes(test_prefix + 'source/a.txt', b'a' * 1000,
+                                metadata={'key1': 'metadata1'})
+    storage_client.upload_bytes(test_prefix + 'source/b.txt', b'')
+
+    stats = transfer(storage_client, test_prefix + 'source/a.txt',
+                     storage_client, test_prefix + 'single/a.txt')
+    results = list(transfer_prefix(storage_client, test_prefix + 'source/',
+                                   storage_client, test_prefix + 'bulk/'))
+    obj_data = storage_client.get_object_properties(
+        test_prefix + 'single/a.txt', metadata=True)
+    contents = storage_client.download_bytes(test_prefix + 'bulk/a.txt')
+    list(storage_client.delete_prefix(test_prefix))
+
+    assert stats['size'] == 1000
+    assert obj_data['metadata']['key1'] == 'metadata1'
+    assert [result['success'] for result in results] == [True, True]
+    assert contents == b'a' * 1000
@@ -0,0 +1,37 @@
+from spongeblob.retriable_storage import RetriableStorage
+from spongeblob.transfer_manager import TransferManager
+import pytest
+
+
+pytestmark = pytest.mark.parametrize('storage_clients', [RetriableStorage],
+                                     indirect=True)
+
+
+def test_upload_download_many(test_data, test_provider, upload_file,
+                              tmpdir_factory, storage_clients):
+    test_prefix = test_data['prefix'] + '_many/'
+    test_keys = [test_prefix + 'test{0}.txt'.format(i) for i in range(4)]
+    download_dir = tmpdir_factory.mktemp(test_data['prefix'])
+    storage_client = storage_clients[test_provider]
+    progress = []
+    manager = TransferManager(storage_client, max_workers=2,
+                              max_inflight_bytes=1,
+                              progress_callback=progress.append)
+
+    upload_results = list(manager.upload_many(
+        [(key, upload_file) for key in test_keys] +
+        [(test_prefix + 'bogus.txt', str(download_dir.join('bogus')))]))
+    download_results = list(manager.download_many(
+        [(key, str(download_dir.join(key.split('/')[-1])))
+         for key in test_keys]))
+    list(storage_client.delete_prefix(test_prefix))
+
+    assert sorted(result['key'] for result in upload_results
+                  if result['success']) == test_keys
+    assert [result['key'] for result in upload_results
+            if not result['success']] == [test_prefix + 'bogus.txt']
+    assert all(result['success'] for result in download_results)
+    assert progress[-1]['done'] == len(test_keys)
+    for key in test_keys:
+        with open(str(download_dir.join(key.split('/')[-1]))) as f:
+            assert f.read() == test_data['filecontents']